@@ -1,11 +1,24 @@
 import argparse
 import importlib
-from pathlib import Path
 import sys
-from colorama import Fore, Style
+from typing import Iterable, Optional
+from modules.daemon.client import forward_to_daemon
+
+# Command name -> (module whose register_command defines it, help text). Modules are only imported
+# when their command runs, so startup does not pay for every command's dependencies
+COMMAND_MANIFEST = {
+    "info": ("modules.audio_analysis.audio_analysis", "Analyze audio file metadata"),
+    "check": ("modules.integrity_check.integrity_check", "Check audio file integrity (always saves to database)"),
+    "count": ("modules.album_counter.cli", "Count albums, songs, or calculate sizes based on metadata"),
+    "cover-art": ("modules.cover_art.cover_art", "Hide or show cover art files"),
+    "songlink": ("modules.SongLink.SongLink", "Fetch song links from Odesli API"),
+    "dbcheck": ("modules.database_check.database_check", "Check and manage databases"),
+    "serve": ("modules.daemon.daemon", "Run a local daemon that other audio_tool commands forward to"),
+}
 
 def print_logo():
     """Print ASCII logo for AUDIO TOOL"""
+    from colorama import Fore, Style
     logo = f"""{Fore.CYAN}
     █████╗ ██╗   ██╗██████╗ ██╗ ██████╗     ████████╗ ██████╗  ██████╗ ██╗
     ██╔══██╗██║   ██║██╔══██╗██║██╔═══██╗    ╚══██╔══╝██╔═══██╗██╔═══██╗██║
@@ -17,8 +30,23 @@ def print_logo():
     """
     print(logo)
 
-def main():
-    """Set up CLI and dynamically register commands from modules in subfolders."""
+def command_from_argv(argv: list) -> Optional[str]:
+    """Get the command name an argument list selects, if any, skipping global options the way
+    build_parser parses them (e.g. '--workers 4 serve')."""
+    parser = argparse.ArgumentParser(add_help=False, exit_on_error=False)
+    parser.add_argument("--workers")
+    parser.add_argument("command", nargs="?")
+    parser.add_argument("arguments", nargs=argparse.REMAINDER)
+    try:
+        args, _ = parser.parse_known_args(argv)
+    except argparse.ArgumentError:
+        return None  # Malformed global options; the full parser reports them
+    return args.command if args.command in COMMAND_MANIFEST else None
+
+def build_parser(commands: Iterable[str] = ()) -> argparse.ArgumentParser:
+    """Build the CLI parser. Only the modules of the given commands are imported to register their
+    full arguments; every other command gets a placeholder from the manifest for the help listing.
+    """
     parser = argparse.ArgumentParser(
         description="Tool for managing audio files",
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -26,30 +54,29 @@ def main():
     parser.add_argument("--workers", type=int, help="Number of worker processes")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
-    # Dynamically import and register modules from subdirectories in 'modules'
-    modules_dir = Path(__file__).parent / 'modules'
-    for module_folder in modules_dir.iterdir():
-        if module_folder.is_dir():
-            # Only load the main module file named after the folder (e.g., album_counter.py)
-            main_module_file = module_folder / f"{module_folder.name}.py"
-            if main_module_file.exists():
-                module_name = f"modules.{module_folder.name}.{module_folder.name}"
-                try:
-                    module = importlib.import_module(module_name)
-                    if hasattr(module, 'register_command'):
-                        module.register_command(subparsers)
-                    else:
-                        print(f"Warning: Module {module_name} does not have a 'register_command' function.")
-                except ImportError as e:
-                    print(f"Error importing module {module_name}: {e}")
+    commands = set(commands)
+    for name, (module_name, help_text) in COMMAND_MANIFEST.items():
+        if name in commands:
+            try:
+                module = importlib.import_module(module_name)
+                if hasattr(module, 'register_command'):
+                    module.register_command(subparsers)
+                    continue
+                print(f"Warning: Module {module_name} does not have a 'register_command' function.")
+            except ImportError as e:
+                print(f"Error importing module {module_name}: {e}")
+        subparsers.add_parser(name, help=help_text)
+    return parser
 
+def run_command(parser: argparse.ArgumentParser, argv: list):
+    """Parse argv and run the selected command."""
     # Check if no arguments were provided
-    if len(sys.argv) == 1:
+    if not argv:
         print_logo()
         parser.print_help()
         sys.exit(0)
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # If command is provided but no func is set (shouldn't happen with required=True)
     if not hasattr(args, 'func'):
@@ -59,6 +86,14 @@ def main():
 
     args.func(args)
 
+def main():
+    """Run a command, on the 'serve' daemon when one is running or in this process otherwise."""
+    command = command_from_argv(sys.argv[1:])
+    exit_code = forward_to_daemon(sys.argv[1:], command)
+    if exit_code is not None:
+        sys.exit(exit_code)
+    run_command(build_parser([command] if command else []), sys.argv[1:])
+
 if __name__ == "__main__":
     try:
         main()
@@ -1,11 +1,11 @@
 from .cli import register_command
 import os
-import concurrent.futures
 from tqdm import tqdm
 import mutagen
 import sqlite3
 import datetime
 from pathlib import Path
+from ..bounded_executor import bounded_as_completed, window_size, process_pool
 
 # This file can be minimal since the registration is handled in cli.py
 # It's kept for consistency with structure where audio_tool.py expects a file named after the folder
@@ -24,9 +24,9 @@ def count_albums(directory: str, save_to_db: bool = True, num_workers: int = Non
     num_workers = num_workers if num_workers is not None else (os.cpu_count() or 4)
     albums = {}
     
-    with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
-        futures = [executor.submit(get_album_info, file) for file in audio_files]
-        for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures), desc="Processing files"):
+    with process_pool(num_workers) as executor:
+        for future, _ in tqdm(bounded_as_completed(executor, get_album_info, audio_files, window_size(num_workers)),
+                              total=len(audio_files), desc="Processing files"):
             try:
                 album_info = future.result()
                 if album_info:
@@ -1,10 +1,11 @@
 import os
 import utils
-from .counters import count_albums, count_songs, calculate_size
-from ..logo_utils import print_album_counter_logo
 
 def count_command(args):
     """Handle the 'count' command to count albums, songs, or calculate sizes."""
+    # Imported here so registering the command (and 'count --help') loads no tqdm, mutagen or sqlite3
+    from .counters import count_albums, count_songs, calculate_size
+    from ..logo_utils import print_album_counter_logo
     if not args.option:
         print_album_counter_logo()
         print("\nAvailable options for 'count' command:")
@@ -1,16 +1,11 @@
-import subprocess
 import sys
+from ..probe_cache import probe_file, get_audio_stream
 
 def get_codec(file_path: str) -> str:
-    """Determine the codec of an audio file using ffprobe."""
+    """Determine the codec of an audio file using cached ffprobe data."""
     try:
-        result = subprocess.run(
-            ["ffprobe", "-v", "error", "-select_streams", "a:0", "-show_entries", "stream=codec_name", "-of", "csv=p=0", file_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        codec_name = result.stdout.strip()
+        stream = get_audio_stream(probe_file(file_path))
+        codec_name = stream.get("codec_name", "") if stream else ""
         return codec_name if codec_name else "Unknown"
     except Exception as e:
         print(f"Error determining codec for {file_path}: {e}", file=sys.stderr)
@@ -1,21 +1,39 @@
 import os
+import itertools
 from pathlib import Path
-import concurrent.futures
+from typing import Iterable, Iterator
 from tqdm import tqdm
 import utils
 from .metadata import extract_metadata
 from .metadata_db import save_metadata_to_db, get_unique_albums_from_db
+from ..bounded_executor import batched_as_completed, window_size, process_pool
 
-def find_unique_albums(audio_files: list, save_to_db: bool = False, db_path: Path = None) -> tuple:
-    """Find unique albums in the given list of audio files."""
+def counted(items: Iterable, pbar: tqdm) -> Iterator:
+    """Yield items from a lazy walk, giving the progress bar its total once the walk is exhausted."""
+    count = 0
+    for item in items:
+        count += 1
+        yield item
+    pbar.total = count
+    pbar.refresh()
+
+def find_unique_albums(audio_files: Iterable[str], save_to_db: bool = False, db_path: Path = None,
+                       num_workers: int = None) -> tuple:
+    """Find unique albums in the given audio files; the input may be a lazy walk.
+    Returns (unique_albums, metadata_list, file_count).
+    """
     metadata_list = []
     unique_albums = set()
+    num_workers = num_workers if num_workers is not None else (os.cpu_count() or 4)
 
-    # Process files in parallel
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        futures = [executor.submit(extract_metadata, file) for file in audio_files]
-        for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures), desc="Processing files"):
-            metadata = future.result()
+    # Process files in parallel in adaptive batches, keeping only a bounded window of tasks in flight.
+    # The walk feeds that window, so the bar has no total until the last files have been found
+    with process_pool(num_workers) as executor, \
+            tqdm(desc="Processing files", unit="file") as pbar:
+        for metadata, backlog in batched_as_completed(executor, extract_metadata, counted(audio_files, pbar),
+                                                      window_size(num_workers)):
+            pbar.set_postfix(backlog=backlog, refresh=False)
+            pbar.update(1)
             if "error" not in metadata:
                 metadata_list.append(metadata)
                 album_key = (
@@ -39,31 +57,32 @@ def find_unique_albums(audio_files: list, save_to_db: bool = False, db_path: Pat
         for album in unique_albums
     ]
 
-    return unique_albums_list, metadata_list
+    return unique_albums_list, metadata_list, pbar.n
 
 def count_albums(directories: list, num_workers: int = None, save_to_db: bool = False):
     """Count unique albums in the given directories."""
     # Get configuration for database path
+    config = utils.load_config()
     if save_to_db:
-        config = utils.load_config()
         cache_folder = Path(config.get("cache_folder", "cache log"))
         db_path = cache_folder / "album_metadata.db"
     else:
         db_path = None
 
-    # Find all audio files
-    all_files = []
-    for directory in directories:
-        all_files.extend(utils.get_audio_files(directory))
+    # Walk all directories lazily; files are submitted as they are found
+    scan_options = utils.get_scan_options(config)
+    all_files = itertools.chain.from_iterable(
+        utils.iter_audio_files(directory, **scan_options) for directory in directories)
 
-    if not all_files:
+    first_file = next(all_files, None)
+    if first_file is None:
         print("No audio files found.")
         return
 
-    print(f"\nFound {len(all_files)} audio files")
-
     # Find unique albums
-    unique_albums, all_metadata = find_unique_albums(all_files, save_to_db, db_path)
+    unique_albums, all_metadata, total_files = find_unique_albums(itertools.chain([first_file], all_files),
+                                                                  save_to_db, db_path, num_workers)
+    print(f"\nFound {total_files} audio files ({len(all_metadata)} with metadata)")
 
     print(f"Found {len(unique_albums)} unique albums\n")
     print("Unique Albums:\n")
@@ -76,19 +95,20 @@ def count_albums(directories: list, num_workers: int = None, save_to_db: bool =
 
 def count_songs(directories: list, num_workers: int = None):
     """Count total songs in the given directories."""
+    config = utils.load_config()
     total_songs = 0
     for directory in directories:
-        audio_files = utils.get_audio_files(directory)
-        total_songs += len(audio_files)
+        total_songs += sum(1 for _ in utils.iter_audio_entries(directory, **utils.get_scan_options(config)))
     print(f"Found {total_songs} audio files")
 
 def calculate_size(directories: list, num_workers: int = None):
     """Calculate total size of audio files in the given directories."""
+    config = utils.load_config()
     total_size = 0
     for directory in directories:
-        audio_files = utils.get_audio_files(directory)
-        for file in audio_files:
-            total_size += os.path.getsize(file)
+        # Entries carry their stat result from the walk, so no extra getsize per file
+        for entry in utils.iter_audio_entries(directory, **utils.get_scan_options(config)):
+            total_size += entry.stat().st_size
     
     # Convert to appropriate unit
     units = ['B', 'KB', 'MB', 'GB', 'TB']
@@ -1,10 +1,9 @@
 import mutagen
 from mutagen.mp4 import MP4
 from .codec import get_codec
-import subprocess
-import json
 import sys
 from pathlib import Path
+from ..tag_reader import read_tags, normalize_tags
 
 def get_album_metadata(file_path: str) -> tuple:
     """Extract album, artist, and codec metadata from an audio file."""
@@ -22,36 +21,38 @@ def get_album_metadata(file_path: str) -> tuple:
         return None, None, None
 
 def extract_metadata(file_path: str) -> dict:
-    """Extract metadata from an audio file using ffprobe."""
+    """Extract metadata from an audio file, reading tags in-process with mutagen where it can parse them."""
     try:
-        cmd = ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", file_path]
-        result = subprocess.check_output(cmd, universal_newlines=True)
-        data = json.loads(result)
-        tags = data.get("format", {}).get("tags", {})
-
-        # Normalize tag names (they can be inconsistent across formats)
-        title = tags.get("title", tags.get("TITLE", "Unknown"))
-        album = tags.get("album", tags.get("ALBUM", "Unknown"))
-        artist = tags.get("artist", tags.get("ARTIST", "Unknown"))
-        album_artist = tags.get("album_artist", tags.get("ALBUM_ARTIST", artist))
-        isrc = tags.get("ISRC", tags.get("isrc", "Unknown"))
-        upc = tags.get("BARCODE", tags.get("UPC", tags.get("upc", "Unknown")))
-
+        return metadata_from_tags(file_path, read_tags(file_path))
+    except Exception as e:
         return {
             "file_path": str(file_path),
-            "title": title,
-            "album": album,
-            "artist": artist,
-            "album_artist": album_artist,
-            "isrc": isrc,
-            "upc": upc
+            "error": str(e)
         }
+
+def metadata_from_probe(file_path: str, data: dict) -> dict:
+    """Build the metadata dictionary from already-probed ffprobe data."""
+    try:
+        return metadata_from_tags(file_path, normalize_tags(data.get("format", {}).get("tags", {})))
     except Exception as e:
         return {
             "file_path": str(file_path),
             "error": str(e)
         }
 
+def metadata_from_tags(file_path: str, tags: dict) -> dict:
+    """Build the metadata dictionary from tags normalized by tag_reader."""
+    artist = tags.get("artist", "Unknown")
+    return {
+        "file_path": str(file_path),
+        "title": tags.get("title", "Unknown"),
+        "album": tags.get("album", "Unknown"),
+        "artist": artist,
+        "album_artist": tags.get("album_artist", artist),
+        "isrc": tags.get("isrc", "Unknown"),
+        "upc": tags.get("upc", "Unknown")
+    }
+
 def is_same_album(metadata1: dict, metadata2: dict) -> bool:
     """Compare two metadata dictionaries to determine if they're from the same album."""
     # If either has an error, they're not the same
@@ -1,36 +1,62 @@
-import subprocess
 import json
 from pathlib import Path
-import concurrent.futures
 from tqdm import tqdm
 import datetime
+import functools
 import os
 import csv
 import utils  # Import from root directory
-from .schema import init_audio_analysis_db, save_analysis_to_db, get_analysis_from_db
-from modules.album_counter.metadata import extract_metadata
+from .schema import init_audio_analysis_db, save_analysis_batch, get_analysis_from_db
+from modules.album_counter.metadata import metadata_from_probe, metadata_from_tags
+from ..probe_cache import probe_file, get_audio_stream
+from ..tag_reader import read_audio_info_mutagen, stream_bit_depth
+from ..database_utils import connections_opened, get_file_info, needs_processing
+from ..bounded_executor import batched_as_completed, window_size, process_pool
 from ..logo_utils import print_audio_analysis_logo
 
-def analyze_single_file(file_path: str) -> dict:
-    """Analyze metadata of a single audio file using ffprobe."""
-    try:
-        # Get metadata first
-        metadata = extract_metadata(file_path)
-        if "error" in metadata:
-            return {"error": f"Failed to extract metadata: {metadata['error']}", "file_path": file_path}
+ANALYSIS_BATCH_SIZE = 500  # results written per transaction
+PROBE_BACKENDS = ('mutagen', 'ffprobe')
+
+def stream_info_from_probe(data: dict) -> dict:
+    """Get the technical details of the first audio stream from ffprobe data."""
+    stream = get_audio_stream(data) or data["streams"][0]
+    return {
+        "codec": stream.get("codec_name", "N/A"),
+        "sample_rate": int(stream.get("sample_rate", 0)) if stream.get("sample_rate") else 0,
+        "channels": int(stream.get("channels", 0)) if stream.get("channels") else 0,
+        "bit_depth": stream_bit_depth(stream.get("codec_name", "N/A"),
+                                      stream.get("bits_per_raw_sample") or stream.get("bits_per_sample")),
+        "bit_rate": int(data["format"].get("bit_rate", 0)) if data["format"].get("bit_rate") else 0,
+    }
 
-        # Get audio analysis data
-        cmd = ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams", file_path]
-        result = subprocess.check_output(cmd, universal_newlines=True)
-        data = json.loads(result)
-        stream = data["streams"][0]
+def analyze_single_file(file_path: str, probe_backend: str = 'mutagen', db_path: Path = None) -> dict:
+    """Analyze metadata of a single audio file.
+    The 'mutagen' backend reads tags and stream details from the container headers in-process and
+    only runs (cached) ffprobe for formats it cannot parse; 'ffprobe' always probes.
+    With db_path, a file that needs_processing reports as unchanged is skipped before it is probed or hashed.
+    """
+    try:
+        if db_path is not None and not needs_processing(db_path, file_path):
+            return {"skipped": True, "file_path": file_path,
+                    "display_text": f"Analyzing: {file_path}\n  Unchanged since the last analysis; skipped.\n"}
+        parsed = read_audio_info_mutagen(file_path) if probe_backend == 'mutagen' else None
+        if parsed is not None:
+            tags, stream_info = parsed
+            metadata = metadata_from_tags(file_path, tags)
+        else:
+            # Tags and stream details both come from the same probe
+            data = probe_file(file_path)
+            metadata = metadata_from_probe(file_path, data)
+            if "error" in metadata:
+                return {"error": f"Failed to extract metadata: {metadata['error']}", "file_path": file_path}
+            stream_info = stream_info_from_probe(data)
 
         # Extract technical details
-        codec = stream.get("codec_name", "N/A")
-        sample_rate = int(stream.get("sample_rate", 0)) if stream.get("sample_rate") else 0
-        channels = int(stream.get("channels", 0)) if stream.get("channels") else 0
-        bit_depth = int(stream.get("bits_per_raw_sample", 0)) if stream.get("bits_per_raw_sample") else 0
-        bit_rate = int(data["format"].get("bit_rate", 0)) if data["format"].get("bit_rate") else 0
+        codec = stream_info["codec"]
+        sample_rate = stream_info["sample_rate"]
+        channels = stream_info["channels"]
+        bit_depth = stream_info["bit_depth"]
+        bit_rate = stream_info["bit_rate"]
 
         # Combine metadata and technical details
         analysis_data = {
@@ -45,7 +71,8 @@ def analyze_single_file(file_path: str) -> dict:
             "bit_depth": bit_depth,
             "bit_rate": bit_rate,
             "channels": channels,
-            "file_path": file_path  # Keep file path for display but don't store in DB
+            "file_path": file_path,  # Keep file path for display but don't store in DB
+            "tracking": get_file_info(file_path)
         }
 
         # Format display text
@@ -122,6 +149,7 @@ def analyze_audio(args):
         print("  --verbose          Print results to console (no parallelism)")
         print("  --workers N        Number of worker processes for parallel analysis")
         print("  --no-db           Do not save analysis data to database")
+        print("  --probe-backend B  mutagen (header parsing, ffprobe fallback) or ffprobe")
         print("\nExample usage:")
         print("  audio_tool.py info /path/to/music")
         print("  audio_tool.py info /path/to/music --output results.csv")
@@ -142,15 +170,16 @@ def analyze_audio(args):
     config = utils.load_config()
     cache_folder = Path(config.get("cache_folder", "cache log"))
     db_path = cache_folder / "audio_analysis.db"
+    # A partial of a module-level function still pickles for the process pool; workers skip
+    # files the database already has before probing them
+    analyze = functools.partial(analyze_single_file, probe_backend=getattr(args, 'probe_backend', None) or 'mutagen',
+                                db_path=db_path if save_to_db else None)
 
-    # Determine files to analyze
-    if os.path.isfile(path) and os.path.splitext(path)[1].lower() in utils.AUDIO_EXTENSIONS:
-        audio_files = [Path(path)]
+    # Determine files to analyze; directories are walked lazily so work starts during the walk
+    if os.path.isfile(path) and utils.is_audio_file(path):
+        audio_files = iter([path])
     elif os.path.isdir(path):
-        audio_files = [file for ext in utils.AUDIO_EXTENSIONS for file in Path(path).rglob(f"*{ext}")]
-        if not audio_files:
-            print(f"No audio files found in '{path}'.")
-            return
+        audio_files = utils.iter_audio_files(path, **utils.get_scan_options(config))
     else:
         print(f"'{path}' is not a file or directory.")
         return
@@ -159,24 +188,47 @@ def analyze_audio(args):
     if save_to_db:
         init_audio_analysis_db(db_path)
 
+    file_count = 0
+    pending = []  # results waiting for the next batched write
+
+    def save_result(result):
+        nonlocal pending
+        if "error" in result or "skipped" in result or not save_to_db:
+            return
+        pending.append(result)
+        if len(pending) >= ANALYSIS_BATCH_SIZE:
+            save_analysis_batch(pending, db_path)
+            pending = []
+
     if verbose:
         # Sequential analysis with console output
         for audio_file in audio_files:
-            result = analyze_single_file(str(audio_file))
+            file_count += 1
+            result = analyze(audio_file)
             print(result["display_text"])
-            if "error" not in result and save_to_db:
-                save_analysis_to_db(result, db_path)
+            save_result(result)
     else:
-        # Parallel analysis
-        with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
-            futures = [executor.submit(analyze_single_file, str(file)) for file in audio_files]
-            for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures), desc="Analyzing audio"):
-                result = future.result()
-                if "error" not in result and save_to_db:
-                    save_analysis_to_db(result, db_path)
+        # Parallel analysis; files are submitted in adaptive batches as the walk finds them
+        with process_pool(num_workers) as executor, \
+                tqdm(desc="Analyzing audio", unit="file") as pbar:
+            for result, backlog in batched_as_completed(executor, analyze, audio_files,
+                                                        window_size(num_workers)):
+                file_count += 1
+                save_result(result)
+                pbar.set_postfix(backlog=backlog, refresh=False)
+                pbar.update(1)
+    if pending:
+        save_analysis_batch(pending, db_path)
+
+    if not file_count:
+        print(f"No audio files found in '{path}'.")
+        return
     
     if save_to_db:
         print(f"Analysis data saved to database: {db_path}")
+    if verbose:
+        # --verbose analyzes every file in this process, so no worker connections are missing
+        print(f"Database connections opened (this process): {connections_opened()}")
 
     # Export data if requested
     if output:
@@ -206,5 +258,7 @@ def register_command(subparsers):
     info_parser.add_argument("--workers", type=int, help="Number of worker processes for parallel analysis")
     info_parser.add_argument("--no-db", action="store_true", help="Do not save analysis data to database")
     info_parser.add_argument("--format", choices=["csv", "json"], help="Export format (csv/json)")
+    info_parser.add_argument("--probe-backend", choices=PROBE_BACKENDS, default='mutagen',
+                             help="Read stream details from headers with mutagen (ffprobe fallback) or always run ffprobe")
     
     info_parser.set_defaults(func=analyze_audio)
@@ -1,17 +1,15 @@
-import subprocess
 import json
 from pathlib import Path
 import sqlite3
 import datetime
 import utils  # Import from root directory
+from ..probe_cache import probe_file, get_audio_stream
 
 def analyze_single_file(file_path: str) -> tuple:
-    """Analyze metadata of a single audio file using ffprobe."""
+    """Analyze metadata of a single audio file using cached ffprobe data."""
     try:
-        cmd = ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams", file_path]
-        result = subprocess.check_output(cmd, universal_newlines=True)
-        data = json.loads(result)
-        stream = data["streams"][0]
+        data = probe_file(file_path)
+        stream = get_audio_stream(data) or data["streams"][0]
 
         codec = stream.get("codec_name", "N/A")
         sample_rate = stream.get("sample_rate", "N/A")
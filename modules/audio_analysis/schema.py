@@ -1,7 +1,6 @@
-import sqlite3
 import datetime
 from pathlib import Path
-from ..database_utils import init_db_with_wal, needs_processing, update_file_tracking, get_db_connection
+from ..database_utils import init_db_with_wal, transaction, get_db_connection, FILE_TRACKING_UPSERT, file_tracking_row
 
 AUDIO_ANALYSIS_SCHEMA = """
 CREATE TABLE IF NOT EXISTS audio_analysis (
@@ -23,65 +22,48 @@ CREATE TABLE IF NOT EXISTS audio_analysis (
 )
 """
 
+# Keeps the row's id and first_analyzed; like the INSERT OR REPLACE it replaced, every save of a
+# file that needed processing refreshes last_updated
+AUDIO_ANALYSIS_UPSERT = """
+INSERT INTO audio_analysis
+(title, album, artist, album_artist, isrc, upc, codec, sample_rate, bit_depth, bit_rate, channels,
+ first_analyzed, last_updated)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (title, album, artist, album_artist, codec, sample_rate, bit_depth, bit_rate, channels)
+DO UPDATE SET isrc = excluded.isrc, upc = excluded.upc, last_updated = excluded.last_updated
+"""
+
 def init_audio_analysis_db(db_path: Path):
     """Initialize the audio analysis database with WAL mode."""
     init_db_with_wal(db_path, AUDIO_ANALYSIS_SCHEMA)
 
-def save_analysis_to_db(analysis_data: dict, db_path: Path):
-    """Save audio analysis data to database with file tracking."""
-    # Initialize database if it doesn't exist
-    init_audio_analysis_db(db_path)
-
-    # Get file path and check if processing is needed
-    file_path = Path(analysis_data.get('file_path', ''))
-    if not file_path.exists() or not needs_processing(db_path, file_path):
-        return
-
+def save_analysis_batch(results: list, db_path: Path):
+    """Save a batch of analysis results and their file tracking rows in one transaction.
+    Call init_audio_analysis_db once before the first batch.
+    """
     now = datetime.datetime.now().isoformat()
-    
-    with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        
-        # Insert or update analysis data
-        cursor.execute("""
-        INSERT OR REPLACE INTO audio_analysis 
-        (title, album, artist, album_artist, isrc, upc, codec, sample_rate, bit_depth, bit_rate, channels,
-         first_analyzed, last_updated)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE((
-            SELECT first_analyzed FROM audio_analysis 
-            WHERE title = ? AND album = ? AND artist = ? AND album_artist = ? AND codec = ? 
-            AND sample_rate = ? AND bit_depth = ? AND bit_rate = ? AND channels = ?
-        ), ?), ?)
-        """, (
-            analysis_data.get('title', 'Unknown'),
-            analysis_data.get('album', 'Unknown'),
-            analysis_data.get('artist', 'Unknown'),
-            analysis_data.get('album_artist', 'Unknown'),
-            analysis_data.get('isrc', 'Unknown'),
-            analysis_data.get('upc', 'Unknown'),
-            analysis_data.get('codec', 'Unknown'),
-            analysis_data.get('sample_rate', 0),
-            analysis_data.get('bit_depth', 0),
-            analysis_data.get('bit_rate', 0),
-            analysis_data.get('channels', 0),
-            # For the COALESCE subquery
-            analysis_data.get('title', 'Unknown'),
-            analysis_data.get('album', 'Unknown'),
-            analysis_data.get('artist', 'Unknown'),
-            analysis_data.get('album_artist', 'Unknown'),
-            analysis_data.get('codec', 'Unknown'),
-            analysis_data.get('sample_rate', 0),
-            analysis_data.get('bit_depth', 0),
-            analysis_data.get('bit_rate', 0),
-            analysis_data.get('channels', 0),
-            # Default values if not found
-            now,
-            now
-        ))
+    rows = [(
+        result.get('title', 'Unknown'),
+        result.get('album', 'Unknown'),
+        result.get('artist', 'Unknown'),
+        result.get('album_artist', 'Unknown'),
+        result.get('isrc', 'Unknown'),
+        result.get('upc', 'Unknown'),
+        result.get('codec', 'Unknown'),
+        result.get('sample_rate', 0),
+        result.get('bit_depth', 0),
+        result.get('bit_rate', 0),
+        result.get('channels', 0),
+        now,
+        now
+    ) for result in results]
+    # Tracking info is computed by the workers, so the parent never reads the files
+    tracking = [file_tracking_row(result['file_path'], result['tracking'], now)
+                for result in results if result.get('tracking')]
 
-        # Update file tracking in the same transaction
-        update_file_tracking(conn, file_path)
-        conn.commit()
+    with transaction(db_path) as conn:
+        conn.executemany(AUDIO_ANALYSIS_UPSERT, rows)
+        conn.executemany(FILE_TRACKING_UPSERT, tracking)
 
 def get_analysis_from_db(db_path: Path) -> list:
     """Get all audio analysis data from database."""
@@ -0,0 +1,170 @@
+import os
+import time
+import tempfile
+import itertools
+import contextlib
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, Iterator, Tuple
+
+# Tasks kept in flight per worker: enough to keep every worker busy, few enough that
+# memory stays flat no matter how many items the input yields
+WINDOW_PER_WORKER = 4
+
+# Batched submission: each task carries a list of items so process pools pay the IPC and
+# pickling cost once per batch; the size adapts so one task takes roughly BATCH_TARGET_SECONDS
+DEFAULT_BATCH_SIZE = 64
+MIN_BATCH_SIZE = 1
+MAX_BATCH_SIZE = 512
+BATCH_TARGET_SECONDS = 0.25
+
+# Long-lived processes (the serve daemon) keep one pool per worker count instead of
+# starting and tearing down worker processes for every command
+_warm_pools = {}
+_keep_pools_warm = False
+
+def keep_pools_warm(enabled: bool = True):
+    """Reuse process pools across commands in this process instead of creating one per command."""
+    global _keep_pools_warm
+    _keep_pools_warm = enabled
+
+def shutdown_warm_pools():
+    """Shut down every pool kept warm by keep_pools_warm."""
+    while _warm_pools:
+        _, pool = _warm_pools.popitem()
+        pool.shutdown()
+
+@contextlib.contextmanager
+def process_pool(max_workers: int = None):
+    """Get a process pool for one command: a fresh one, or a warm shared one in daemon mode."""
+    if not _keep_pools_warm:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            yield executor
+        return
+    pool = _warm_pools.get(max_workers)
+    if pool is None:
+        pool = _warm_pools[max_workers] = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        yield pool
+    except BrokenProcessPool:
+        # A crashed worker poisons the pool; drop it so the next command starts a new one
+        _warm_pools.pop(max_workers, None)
+        raise
+
+def window_size(num_workers: int, per_worker: int = WINDOW_PER_WORKER) -> int:
+    """Get the number of in-flight tasks to allow for a pool of num_workers."""
+    return max(1, num_workers) * per_worker
+
+def bounded_as_completed(executor: concurrent.futures.Executor, fn: Callable, items: Iterable,
+                         max_in_flight: int) -> Iterator[Tuple[concurrent.futures.Future, int]]:
+    """Submit fn(item) for each item, keeping at most max_in_flight tasks pending.
+    Yields (future, backlog) as tasks complete, where backlog is the number still in flight;
+    items are pulled lazily, so a generator input is only consumed as capacity frees up.
+    """
+    items = iter(items)
+    pending = {executor.submit(fn, item) for item in itertools.islice(items, max_in_flight)}
+    try:
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            pending.update(executor.submit(fn, item) for item in itertools.islice(items, len(done)))
+            for future in done:
+                yield future, len(pending)
+    finally:
+        # A caller that stops early (or a cancelled daemon job) leaves no queued work in a warm pool
+        for future in pending:
+            future.cancel()
+
+def run_batch(fn: Callable, items: list) -> Tuple[list, float]:
+    """Worker entry point for batched submission: apply fn to every item.
+    Returns (results, seconds spent) so the parent can size the next batches.
+    """
+    start = time.perf_counter()
+    results = [fn(item) for item in items]
+    return results, time.perf_counter() - start
+
+def next_batch_size(current: int, batch_len: int, elapsed: float,
+                    target: float = BATCH_TARGET_SECONDS) -> int:
+    """Pick the next batch size from the per-item latency a finished batch observed."""
+    if batch_len == 0:
+        return current
+    if elapsed <= 0:
+        return min(MAX_BATCH_SIZE, current * 2)
+    ideal = int(target / (elapsed / batch_len))
+    # Move halfway towards the ideal size so one slow file does not swing the size wildly
+    return max(MIN_BATCH_SIZE, min(MAX_BATCH_SIZE, (current + ideal) // 2))
+
+def batched_as_completed(executor: concurrent.futures.Executor, fn: Callable, items: Iterable,
+                         max_in_flight: int, batch_size: int = None) -> Iterator[Tuple[object, int]]:
+    """Like bounded_as_completed, but submits run_batch(fn, batch) tasks and yields (result, backlog)
+    for each item as its batch completes. backlog counts items still in flight.
+    fn must be picklable (a module-level function) when the executor is a process pool.
+    Pass batch_size to fix the size; otherwise it adapts to the observed per-item latency.
+    """
+    items = iter(items)
+    adaptive = batch_size is None
+    size = DEFAULT_BATCH_SIZE if adaptive else max(1, batch_size)
+    pending = {}
+
+    def submit(count):
+        for _ in range(count):
+            batch = list(itertools.islice(items, size))
+            if not batch:
+                return
+            pending[executor.submit(run_batch, fn, batch)] = len(batch)
+
+    submit(max_in_flight)
+    try:
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            finished = []
+            for future in done:
+                batch_len = pending.pop(future)
+                results, elapsed = future.result()
+                if adaptive:
+                    size = next_batch_size(size, batch_len, elapsed)
+                finished.append(results)
+            submit(len(done))
+            backlog = sum(pending.values())
+            for results in finished:
+                for result in results:
+                    yield result, backlog
+    finally:
+        for future in pending:
+            future.cancel()
+
+def _read_head(file_path: str) -> int:
+    """Benchmark work item: stat a file and read its first block."""
+    with open(file_path, 'rb') as f:
+        return len(f.read(4096)) + os.fstat(f.fileno()).st_size
+
+def benchmark_submission(num_files: int = 5000, file_size: int = 16 * 1024,
+                         num_workers: int = None) -> Dict[str, float]:
+    """Compare per-file and batched process pool submission on a synthetic library, in files/s."""
+    num_workers = num_workers or os.cpu_count() or 4
+    results = {}
+    with tempfile.TemporaryDirectory() as library:
+        payload = os.urandom(file_size)
+        paths = []
+        for i in range(num_files):
+            path = os.path.join(library, f"{i:06d}.mp3")
+            with open(path, 'wb') as f:
+                f.write(payload)
+            paths.append(path)
+
+        modes = {
+            'per-file': lambda executor: (future.result() for future, _ in
+                                          bounded_as_completed(executor, _read_head, paths, window_size(num_workers))),
+            'batched (adaptive)': lambda executor: (result for result, _ in
+                                                    batched_as_completed(executor, _read_head, paths, window_size(num_workers))),
+        }
+        for mode, run in modes.items():
+            with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+                start = time.perf_counter()
+                count = sum(1 for _ in run(executor))
+                results[mode] = count / (time.perf_counter() - start)
+    return results
+
+if __name__ == "__main__":
+    # Run with: python -m modules.bounded_executor
+    for mode, speed in benchmark_submission().items():
+        print(f"  {mode:<20} {speed:10.0f} files/s")
@@ -0,0 +1,122 @@
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+import utils  # Import from root directory
+from .hashing import HASH_ALGORITHMS, hash_file, hash_file_multi, get_hash_algorithm, new_hasher
+
+# Change detection levels, cheapest first:
+#   stat    - (size, mtime_ns, inode) only; any difference counts as a change
+#   partial - on a stat mismatch, compare a hash of the head, middle and tail of the file
+#   full    - on a stat mismatch, compare a hash of the whole file
+CHANGE_DETECTION_LEVELS = ('stat', 'partial', 'full')
+DEFAULT_CHANGE_DETECTION_LEVEL = 'partial'
+PARTIAL_HASH_SAMPLE_SIZE = 64 * 1024  # bytes read from each of head, middle and tail
+
+# Algorithm of partial hashes stored before rows carried a partial_hash_algorithm tag
+LEGACY_PARTIAL_HASH_ALGORITHM = 'blake2b_128'
+
+@lru_cache(maxsize=None)
+def get_change_detection_level() -> str:
+    """Get the configured change detection level from the config file."""
+    config = utils.load_config()
+    level = config.get("change_detection", {}).get("level", DEFAULT_CHANGE_DETECTION_LEVEL)
+    return level if level in CHANGE_DETECTION_LEVELS else DEFAULT_CHANGE_DETECTION_LEVEL
+
+def file_signature(file_path: str, stat_result: os.stat_result = None) -> dict:
+    """Get the metadata-only signature of a file: size, nanosecond mtime and inode."""
+    st = stat_result if stat_result is not None else os.stat(file_path)
+    return {
+        'mtime': st.st_mtime,
+        'file_size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'inode': st.st_ino
+    }
+
+def signature_matches(stored: Tuple[Optional[int], Optional[int], Optional[int]], current: dict) -> bool:
+    """Check a stored (file_size, mtime_ns, inode) triple against a current signature."""
+    stored_size, stored_mtime_ns, stored_inode = stored
+    return (stored_mtime_ns is not None
+            and stored_size == current['file_size']
+            and stored_mtime_ns == current['mtime_ns']
+            and stored_inode == current['inode'])
+
+def partial_hash_multi(file_path: str, algorithms: Iterable[str],
+                       sample_size: int = PARTIAL_HASH_SAMPLE_SIZE) -> Dict[str, str]:
+    """Hash the file size plus samples from the head, middle and tail of a file with several
+    algorithms, reading the samples once."""
+    hashers = {algorithm: new_hasher(algorithm) for algorithm in algorithms}
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        samples = [size.to_bytes(8, 'little')]
+        if size <= sample_size * 3:
+            samples.append(f.read())
+        else:
+            for offset in (0, (size - sample_size) // 2, size - sample_size):
+                f.seek(offset)
+                samples.append(f.read(sample_size))
+    for hasher in hashers.values():
+        for sample in samples:
+            hasher.update(sample)
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+
+def partial_hash(file_path: str, algorithm: str = None, sample_size: int = PARTIAL_HASH_SAMPLE_SIZE) -> str:
+    """Hash the file size plus samples from the head, middle and tail of a file."""
+    algorithm = algorithm or get_hash_algorithm()
+    return partial_hash_multi(file_path, (algorithm,), sample_size)[algorithm]
+
+def compute_hashes(file_path: str, level: str = None) -> Dict[str, Optional[str]]:
+    """Compute the hashes the given level stores, as partial_hash, partial_hash_algorithm, file_hash
+    and hash_algorithm. Hashes the level does not use are None.
+    """
+    level = level or get_change_detection_level()
+    hashes = {'partial_hash': None, 'partial_hash_algorithm': None, 'file_hash': None, 'hash_algorithm': None}
+    if level in ('partial', 'full'):
+        hashes['partial_hash_algorithm'] = get_hash_algorithm()
+        hashes['partial_hash'] = partial_hash(file_path, hashes['partial_hash_algorithm'])
+    if level == 'full':
+        hashes['hash_algorithm'] = get_hash_algorithm()
+        hashes['file_hash'] = hash_file(file_path, hashes['hash_algorithm'])
+    return hashes
+
+def content_matches(file_path: str, stored_partial: Optional[str], stored_full: Optional[str],
+                    stored_algorithm: str, stored_partial_algorithm: str = None,
+                    level: str = None) -> Tuple[bool, Dict[str, str]]:
+    """Decide whether a file whose signature changed still has the same content.
+    Returns (matches, hashes) where hashes holds freshly computed values worth storing: rows written
+    before partial hashes existed gain one, and hashes in an older algorithm are migrated to the
+    current one in the same read pass. An untagged partial hash is LEGACY_PARTIAL_HASH_ALGORITHM.
+    """
+    level = level or get_change_detection_level()
+    if level == 'stat':
+        return False, {}
+    if level == 'full' and stored_full:
+        return _full_hash_matches(file_path, stored_full, stored_algorithm)
+    if stored_partial:
+        return _partial_hash_matches(file_path, stored_partial,
+                                     stored_partial_algorithm or LEGACY_PARTIAL_HASH_ALGORITHM)
+    if stored_full:
+        matches, hashes = _full_hash_matches(file_path, stored_full, stored_algorithm)
+        hashes['partial_hash_algorithm'] = get_hash_algorithm()
+        hashes['partial_hash'] = partial_hash(file_path, hashes['partial_hash_algorithm'])
+        return matches, hashes
+    return False, {}
+
+def _partial_hash_matches(file_path: str, stored_partial: str, stored_algorithm: str) -> Tuple[bool, Dict[str, str]]:
+    """Compare a stored partial hash, hashing the same samples with the current algorithm too if it differs."""
+    current_algorithm = get_hash_algorithm()
+    if stored_algorithm not in HASH_ALGORITHMS:
+        return False, {}  # Written with a hasher that is no longer installed; cannot be compared
+    if stored_algorithm == current_algorithm:
+        return partial_hash(file_path, stored_algorithm) == stored_partial, {}
+    digests = partial_hash_multi(file_path, (stored_algorithm, current_algorithm))
+    return digests[stored_algorithm] == stored_partial, {'partial_hash': digests[current_algorithm],
+                                                         'partial_hash_algorithm': current_algorithm}
+
+def _full_hash_matches(file_path: str, stored_full: str, stored_algorithm: str) -> Tuple[bool, Dict[str, str]]:
+    """Compare a stored full hash, re-hashing with the current algorithm in the same pass if it differs."""
+    current_algorithm = get_hash_algorithm()
+    if stored_algorithm == current_algorithm:
+        return hash_file(file_path, stored_algorithm) == stored_full, {}
+    digests = hash_file_multi(file_path, (stored_algorithm, current_algorithm))
+    return digests[stored_algorithm] == stored_full, {'file_hash': digests[current_algorithm],
+                                                      'hash_algorithm': current_algorithm}
@@ -4,6 +4,7 @@ import concurrent.futures
 from tqdm import tqdm
 import utils  # Import from root directory
 from ..logo_utils import print_cover_art_logo
+from ..bounded_executor import bounded_as_completed, window_size
 
 # Base cover art filenames
 BASE_COVER_NAMES = ['cover.jpg', 'cover.jpeg', 'cover.png', 'folder.jpg', 'folder.png']
@@ -76,8 +77,9 @@ def hide_cover_art(path: str):
         
     print(f"\nHiding {len(files_to_rename)} cover art files...")
     with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = [executor.submit(rename_file, src, dst) for src, dst in files_to_rename]
-        for _ in tqdm(concurrent.futures.as_completed(futures), total=len(futures)):
+        renames = bounded_as_completed(executor, lambda pair: rename_file(*pair), files_to_rename,
+                                       window_size(os.cpu_count() or 4))
+        for _ in tqdm(renames, total=len(files_to_rename)):
             pass
     print("Cover art files hidden successfully.")
 
@@ -90,8 +92,9 @@ def show_cover_art(path: str):
         
     print(f"\nShowing {len(files_to_rename)} hidden cover art files...")
     with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = [executor.submit(rename_file, src, dst) for src, dst in files_to_rename]
-        for _ in tqdm(concurrent.futures.as_completed(futures), total=len(futures)):
+        renames = bounded_as_completed(executor, lambda pair: rename_file(*pair), files_to_rename,
+                                       window_size(os.cpu_count() or 4))
+        for _ in tqdm(renames, total=len(files_to_rename)):
             pass
     print("Cover art files shown successfully.")
 
@@ -0,0 +1,70 @@
+import os
+import sys
+import json
+import zlib
+import socket
+from pathlib import Path
+from typing import Optional
+
+# Set to run a command in-process even when a daemon is listening
+NO_DAEMON_ENV = "AUDIO_TOOL_NO_DAEMON"
+# Set to use a specific socket path instead of the per-directory default
+SOCKET_ENV = "AUDIO_TOOL_SOCKET"
+
+# Seconds to wait for the daemon to connect and accept a job before running it in this process
+DAEMON_ACCEPT_TIMEOUT = 5.0
+
+# Commands that always run in-process: the daemon itself, and commands that never finish on their own
+LOCAL_COMMANDS = ("serve",)
+LOCAL_OPTIONS = ("--watch",)
+
+def get_socket_path() -> Path:
+    """Get the path of the serve daemon's Unix socket: $AUDIO_TOOL_SOCKET, or one per working directory
+    in the user's runtime directory. Reads no config and creates nothing, so startup has no side effects.
+    """
+    if os.environ.get(SOCKET_ENV):
+        return Path(os.environ[SOCKET_ENV])
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    # The daemon serves one working directory, so the name is derived from it
+    cwd_id = zlib.crc32(os.path.realpath(os.getcwd()).encode("utf-8", "surrogateescape"))
+    return Path(runtime_dir) / f"audio_tool-{os.getuid()}-{cwd_id:08x}.sock"
+
+def runs_locally(command: Optional[str], argv: list) -> bool:
+    """Check whether a command must run in this process rather than on the daemon."""
+    return (command is None or command in LOCAL_COMMANDS
+            or any(arg.split("=")[0] in LOCAL_OPTIONS for arg in argv))
+
+def forward_to_daemon(argv: list, command: Optional[str]) -> Optional[int]:
+    """Run a command on the serve daemon if one is listening.
+    Returns the command's exit code, or None when it should run in this process instead: no daemon,
+    a busy or unresponsive one, or a command that must run locally. Interrupting the client cancels
+    the job on the daemon.
+    """
+    if runs_locally(command, argv) or os.environ.get(NO_DAEMON_ENV) or not hasattr(socket, "AF_UNIX"):
+        return None
+    socket_path = get_socket_path()
+    if not socket_path.exists():
+        return None
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(DAEMON_ACCEPT_TIMEOUT)
+        try:
+            sock.connect(str(socket_path))
+            sock.sendall((json.dumps({"argv": argv, "cwd": os.getcwd()}) + "\n").encode("utf-8"))
+            reply = sock.makefile("r", encoding="utf-8")
+            message = json.loads(reply.readline() or "{}")
+        except (OSError, ValueError):
+            return None  # Stale socket file, or a daemon that is going away or not answering; run locally
+        if "accepted" not in message:
+            return None  # Refused: busy, another working directory, or a command it does not run
+        # Accepted jobs may run for a long time between lines of output
+        sock.settimeout(None)
+        for line in reply:
+            message = json.loads(line)
+            if "out" in message:
+                sys.stdout.write(message["out"])
+                sys.stdout.flush()
+            elif "exit" in message:
+                return message["exit"]
+    print("Lost connection to the audio_tool daemon.")
+    return 1
@@ -0,0 +1,178 @@
+import io
+import os
+import json
+import queue
+import signal
+import socket
+import threading
+import contextlib
+from ..bounded_executor import keep_pools_warm, shutdown_warm_pools
+from .client import LOCAL_COMMANDS, get_socket_path
+
+class _SocketWriter:
+    """File-like object that streams a job's console output to the client."""
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self.connected = True
+
+    def write(self, text: str) -> int:
+        if text and self.connected:
+            try:
+                self.conn.sendall((json.dumps({"out": text}) + "\n").encode("utf-8"))
+            except OSError:
+                self.connected = False  # Client went away; the job is being cancelled
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+class JobCancelled(KeyboardInterrupt):
+    """Raised on the main thread when the client of the running job disconnects."""
+
+# Whether a forwarded job is running; only used on the main thread, where signal handlers run
+_job_active = False
+
+def _cancel_job(signum, frame):
+    """SIGUSR1 handler: stop the running job, once, unless it has already finished."""
+    global _job_active
+    if _job_active:
+        _job_active = False
+        raise JobCancelled()
+
+def _watch_client(conn: socket.socket, job_done: threading.Event, main_thread_id: int):
+    """Wait for the client to hang up (it sends nothing after the request) and cancel the job if it
+    is still running, e.g. after Ctrl+C in the client."""
+    try:
+        while conn.recv(4096):
+            pass
+    except OSError:
+        pass
+    if not job_done.is_set():
+        signal.pthread_kill(main_thread_id, signal.SIGUSR1)
+
+def _send(conn: socket.socket, message: dict):
+    """Send one JSON line to a client."""
+    conn.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+def handle_job(conn: socket.socket, parser):
+    """Run one forwarded command with its output streamed back over the connection.
+    Commands that never finish on their own (check --watch) are refused so the client runs them itself.
+    """
+    global _job_active
+    request = json.loads(conn.makefile("r", encoding="utf-8").readline())
+    # Relative paths, the config file and the cache folder all resolve against the working directory
+    if os.path.realpath(request.get("cwd", "")) != os.path.realpath(os.getcwd()):
+        _send(conn, {"refused": "different working directory"})
+        return
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            args = parser.parse_args(request["argv"])
+    except SystemExit:
+        args = None  # Usage errors and --help are printed by run_command below
+    if args is not None and (args.command in LOCAL_COMMANDS or getattr(args, 'watch', False)):
+        _send(conn, {"refused": "runs in the client"})
+        return
+    _send(conn, {"accepted": True})
+
+    import audio_tool  # Import from root directory
+    writer = _SocketWriter(conn)
+    job_done = threading.Event()
+    threading.Thread(target=_watch_client, args=(conn, job_done, threading.main_thread().ident),
+                     name="daemon-client-watch", daemon=True).start()
+    exit_code = 0
+    with contextlib.redirect_stdout(writer), contextlib.redirect_stderr(writer):
+        try:
+            _job_active = True
+            audio_tool.run_command(parser, request["argv"])
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except JobCancelled:
+            exit_code = None
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            print(f"Error: {e}")
+            exit_code = 1
+        finally:
+            _job_active = False
+            job_done.set()
+    if exit_code is None:
+        print(f"Cancelled '{' '.join(request['argv'])}': the client disconnected.")
+    elif writer.connected:
+        _send(conn, {"exit": exit_code})
+
+def _accept_jobs(server: socket.socket, jobs: queue.Queue, busy: threading.Lock):
+    """Accept clients: hand them to the main thread when it is idle, and tell them to run the command
+    themselves while a job is running, so no client waits silently behind a long job."""
+    while True:
+        try:
+            conn, _ = server.accept()
+        except OSError:
+            return  # Server socket closed
+        if busy.acquire(blocking=False):
+            jobs.put(conn)
+            continue
+        with conn, contextlib.suppress(OSError):
+            conn.settimeout(1.0)
+            conn.makefile("r", encoding="utf-8").readline()
+            _send(conn, {"refused": "busy"})
+
+def serve(args):
+    """Handle the 'serve' command: run forwarded commands with warm modules, pools and connections."""
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: The daemon needs Unix domain sockets, which this platform does not provide.")
+        return
+
+    socket_path = get_socket_path()
+    if socket_path.exists():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(socket_path))
+                print(f"A daemon is already listening on '{socket_path}'.")
+                return
+            except OSError:
+                socket_path.unlink()  # Left behind by a daemon that did not shut down cleanly
+
+    import audio_tool  # Import from root directory
+    # Load every command up front so forwarded jobs never pay an import
+    parser = audio_tool.build_parser(audio_tool.COMMAND_MANIFEST)
+    keep_pools_warm()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(str(socket_path))
+        os.chmod(socket_path, 0o600)
+        server.listen()
+        print(f"Serving audio_tool commands on '{socket_path}' from '{os.getcwd()}' (Ctrl+C to stop).")
+        print("Restart the daemon after editing the config file.")
+        # Jobs run one at a time on this thread, where the cancel signal is delivered;
+        # clients arriving meanwhile are told to run their command themselves
+        signal.signal(signal.SIGUSR1, _cancel_job)
+        jobs = queue.Queue()
+        busy = threading.Lock()
+        threading.Thread(target=_accept_jobs, args=(server, jobs, busy), name="daemon-accept", daemon=True).start()
+        while True:
+            conn = jobs.get()
+            with conn:
+                try:
+                    handle_job(conn, parser)
+                except (OSError, ValueError) as e:
+                    print(f"Error handling job: {e}")
+                except JobCancelled:
+                    pass  # The client hung up while its finished job was being wrapped up
+                finally:
+                    busy.release()
+    finally:
+        server.close()
+        with contextlib.suppress(FileNotFoundError):
+            socket_path.unlink()
+        shutdown_warm_pools()
+
+def register_command(subparsers):
+    """Register the 'serve' command with the subparsers."""
+    serve_parser = subparsers.add_parser("serve", help="Run a local daemon that other audio_tool commands forward to")
+    serve_parser.set_defaults(func=serve)
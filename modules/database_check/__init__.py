@@ -1,5 +1,5 @@
 from .database_check import register_command
-from .core import calculate_file_hash, check_database_exists, get_database_summary
+from .core import calculate_file_hash, check_database_exists, get_database_summary, has_integrity_results
 from .schema import update_database_schema
 from .list_entries import list_database_entries
 from .monitor import watch_database, quick_check_database
@@ -9,6 +9,7 @@ __all__ = [
     'calculate_file_hash',
     'check_database_exists',
     'get_database_summary',
+    'has_integrity_results',
     'update_database_schema',
     'list_database_entries',
     'watch_database',
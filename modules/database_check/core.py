@@ -1,16 +1,12 @@
 import os
-import hashlib
 from pathlib import Path
 import sqlite3
+from ..hashing import hash_file
 
 def calculate_file_hash(file_path: str) -> str:
     """Calculate the MD5 hash of a file."""
-    md5 = hashlib.md5()
     try:
-        with open(file_path, 'rb') as f:
-            while chunk := f.read(8192):
-                md5.update(chunk)
-        return md5.hexdigest()
+        return hash_file(file_path, 'md5')
     except (FileNotFoundError, PermissionError):
         return None
 
@@ -18,6 +14,19 @@ def check_database_exists(db_path: Path) -> bool:
     """Check if the database file exists."""
     return db_path.exists()
 
+def has_integrity_results(cursor: sqlite3.Cursor) -> bool:
+    """Check that an integrity database uses the integrity_results table, explaining how to migrate if not."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name = 'integrity_results'")
+    if cursor.fetchone():
+        return True
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('passed_files', 'failed_files')")
+    if cursor.fetchall():
+        print("Error: Database uses the old passed_files/failed_files layout. "
+              "Run 'audio_tool.py dbcheck --update' to migrate it.")
+    else:
+        print("Error: Database structure is invalid. Missing required tables.")
+    return False
+
 def get_database_summary(db_path: Path) -> tuple:
     """Get a summary of the database contents."""
     if not check_database_exists(db_path):
@@ -26,10 +35,11 @@ def get_database_summary(db_path: Path) -> tuple:
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
-    cursor.execute("SELECT COUNT(*) FROM passed_files")
-    passed_count = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM failed_files")
-    failed_count = cursor.fetchone()[0]
+    # One scan of the covering (status, codec) index
+    cursor.execute("SELECT status, COUNT(*) FROM integrity_results GROUP BY status")
+    counts = dict(cursor.fetchall())
+    passed_count = counts.get('PASSED', 0)
+    failed_count = counts.get('FAILED', 0)
 
     conn.close()
     return passed_count, failed_count, None 
\ No newline at end of file
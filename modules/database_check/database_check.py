@@ -9,10 +9,13 @@ import os
 import json
 import csv
 import sqlite3
-from ..database_utils import init_db_with_wal, get_db_connection
+from ..database_utils import init_db_with_wal, get_db_connection, ensure_columns
 from ..logo_utils import print_database_check_logo
+from ..bounded_executor import batched_as_completed, window_size, process_pool
 from tqdm import tqdm
 
+CODEC_UPDATE_BATCH_SIZE = 500  # codec updates written per transaction
+
 def format_size(size_in_bytes):
     """Format size in bytes to human readable string."""
     for unit in ['B', 'KB', 'MB', 'GB']:
@@ -64,7 +67,8 @@ def get_database_description(db_name: str) -> str:
     """Get a description of what the database is used for."""
     descriptions = {
         "album_metadata.db": "Stores album metadata including title, artist, album, ISRC, and UPC",
-        "audio_analysis.db": "Stores audio technical details including codec, bitrate, sample rate, and channels"
+        "audio_analysis.db": "Stores audio technical details including codec, bitrate, sample rate, and channels",
+        "probe_cache.db": "Caches ffprobe format and stream information per file version (path, size, mtime)"
     }
     return descriptions.get(db_name, "Unknown database")
 
@@ -124,7 +128,7 @@ def show_filtered_results(db_path: Path, filter_status: str = None, codec_filter
                 params = []
                 conditions = []
                 
-                if filter_status and table in ['passed_files', 'failed_files']:
+                if filter_status and table == 'integrity_results':
                     conditions.append("status = ?")
                     params.append(filter_status)
                 
@@ -335,7 +339,7 @@ def export_database(db_path: Path, format: str, filter_status: str = None, codec
                 params = []
                 conditions = []
                 
-                if filter_status and table in ['passed_files', 'failed_files']:
+                if filter_status and table == 'integrity_results':
                     conditions.append("status = ?")
                     params.append(filter_status)
                 
@@ -418,7 +422,10 @@ def migrate_database(db_path: Path) -> bool:
         elif module_name == 'albummetadata':
             from ..album_counter.schema import ALBUM_METADATA_SCHEMA as schema
         elif module_name == 'integritycheck':
-            from ..integrity_check.integrity_check import INTEGRITY_CHECK_SCHEMA as schema
+            from ..integrity_check.db_init import (INTEGRITY_RESULTS_SCHEMA as schema, INTEGRITY_RESULTS_ADDED_COLUMNS,
+                                                   migrate_integrity_tables)
+        elif module_name == 'probecache':
+            from ..probe_cache import PROBE_CACHE_SCHEMA as schema
         else:
             print(f"Unknown database type: {db_path.name}")
             return False
@@ -430,11 +437,23 @@ def migrate_database(db_path: Path) -> bool:
             shutil.copy2(db_path, backup_path)
             print(f"Created backup: {backup_path}")
 
+        # Fold the old passed_files/failed_files tables into integrity_results before the schema
+        # recreates them as views
+        if module_name == 'integritycheck':
+            conn = sqlite3.connect(db_path, timeout=60)
+            try:
+                if migrate_integrity_tables(conn):
+                    print(f"Migrated passed_files/failed_files into integrity_results in: {db_path}")
+            finally:
+                conn.close()
+
         # Enable WAL mode and update schema
         init_db_with_wal(db_path, schema)
         
-        # Update codec information for integrity check database
+        # Add newer columns and update codec information for integrity check database
         if module_name == 'integritycheck':
+            with get_db_connection(db_path) as conn:
+                ensure_columns(conn.cursor(), 'integrity_results', INTEGRITY_RESULTS_ADDED_COLUMNS)
             update_codec_information(db_path)
             
         print(f"Updated schema and enabled WAL mode for: {db_path}")
@@ -444,73 +463,52 @@ def migrate_database(db_path: Path) -> bool:
         print(f"Error migrating database {db_path}: {e}")
         return False
 
-def update_codec_information(db_path: Path):
-    """Update codec information for files in the integrity check database."""
-    print("Updating codec information...")
+def _probe_codec(file_path: str) -> tuple:
+    """Worker entry point for update_codec_information: probe and classify one file's codec."""
     from ..integrity_check.check_file import get_codec, normalize_codec
+    return (file_path,) + normalize_codec(get_codec(file_path))
+
+def update_codec_information(db_path: Path, num_workers: int = None):
+    """Update codec information for files in the integrity check database.
+    Probing runs in worker processes; the parent only applies the results, in batched transactions.
+    """
+    print("Updating codec information...")
+    num_workers = num_workers or os.cpu_count() or 4
     
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     try:
         # Check if codec and codec_type columns exist
-        cursor.execute("PRAGMA table_info(passed_files)")
-        columns = [row[1] for row in cursor.fetchall()]
-        if 'codec' not in columns:
-            print("Adding codec column to passed_files table...")
-            cursor.execute("ALTER TABLE passed_files ADD COLUMN codec TEXT")
-        if 'codec_type' not in columns:
-            print("Adding codec_type column to passed_files table...")
-            cursor.execute("ALTER TABLE passed_files ADD COLUMN codec_type TEXT")
-        
-        cursor.execute("PRAGMA table_info(failed_files)")
+        cursor.execute("PRAGMA table_info(integrity_results)")
         columns = [row[1] for row in cursor.fetchall()]
         if 'codec' not in columns:
-            print("Adding codec column to failed_files table...")
-            cursor.execute("ALTER TABLE failed_files ADD COLUMN codec TEXT")
+            print("Adding codec column to integrity_results table...")
+            cursor.execute("ALTER TABLE integrity_results ADD COLUMN codec TEXT")
         if 'codec_type' not in columns:
-            print("Adding codec_type column to failed_files table...")
-            cursor.execute("ALTER TABLE failed_files ADD COLUMN codec_type TEXT")
-        
-        # Update passed files
-        cursor.execute("SELECT file_path FROM passed_files WHERE codec IS NULL OR codec = 'unknown' OR codec_type IS NULL")
-        passed_files = cursor.fetchall()
-        print(f"Found {len(passed_files)} passed files without complete codec information")
-        
-        if passed_files:
-            print("Updating codec information for passed files...")
-            for (file_path,) in tqdm(passed_files, desc="Processing passed files"):
-                try:
-                    raw_codec = get_codec(file_path)
-                    codec, codec_type = normalize_codec(raw_codec)
-                    cursor.execute("""
-                        UPDATE passed_files 
-                        SET codec = ?, codec_type = ? 
-                        WHERE file_path = ?
-                    """, (codec, codec_type, file_path))
-                except Exception as e:
-                    print(f"\nError updating codec for {file_path}: {e}")
+            print("Adding codec_type column to integrity_results table...")
+            cursor.execute("ALTER TABLE integrity_results ADD COLUMN codec_type TEXT")
+        conn.commit()
         
-        # Update failed files
-        cursor.execute("SELECT file_path FROM failed_files WHERE codec IS NULL OR codec = 'unknown' OR codec_type IS NULL")
-        failed_files = cursor.fetchall()
-        print(f"Found {len(failed_files)} failed files without complete codec information")
+        # Update passed and failed files in one pass
+        cursor.execute("SELECT file_path FROM integrity_results WHERE codec IS NULL OR codec = 'unknown' OR codec_type IS NULL")
+        files = [row[0] for row in cursor.fetchall()]
+        print(f"Found {len(files)} files without complete codec information")
         
-        if failed_files:
-            print("Updating codec information for failed files...")
-            for (file_path,) in tqdm(failed_files, desc="Processing failed files"):
-                try:
-                    raw_codec = get_codec(file_path)
-                    codec, codec_type = normalize_codec(raw_codec)
-                    cursor.execute("""
-                        UPDATE failed_files 
-                        SET codec = ?, codec_type = ? 
-                        WHERE file_path = ?
-                    """, (codec, codec_type, file_path))
-                except Exception as e:
-                    print(f"\nError updating codec for {file_path}: {e}")
+        if files:
+            print("Updating codec information...")
+            updates = []
+            with process_pool(num_workers) as executor, \
+                    tqdm(total=len(files), desc="Processing files") as pbar:
+                for (file_path, codec, codec_type), _ in batched_as_completed(
+                        executor, _probe_codec, files, window_size(num_workers)):
+                    updates.append((codec, codec_type, file_path))
+                    if len(updates) >= CODEC_UPDATE_BATCH_SIZE:
+                        _apply_codec_updates(conn, updates)
+                        updates = []
+                    pbar.update(1)
+            _apply_codec_updates(conn, updates)
         
-        conn.commit()
         print("Codec information update complete")
         
     except Exception as e:
@@ -519,6 +517,11 @@ def update_codec_information(db_path: Path):
     finally:
         conn.close()
 
+def _apply_codec_updates(conn: sqlite3.Connection, updates: list):
+    """Write a batch of (codec, codec_type, file_path) updates in one transaction."""
+    with conn:
+        conn.executemany("UPDATE integrity_results SET codec = ?, codec_type = ? WHERE file_path = ?", updates)
+
 def register_command(subparsers):
     """Register the database check command."""
     db_parser = subparsers.add_parser("dbcheck", help="Check and manage databases")
@@ -3,7 +3,7 @@ import sqlite3
 import json
 import csv
 from pathlib import Path
-from .core import calculate_file_hash, check_database_exists
+from .core import calculate_file_hash, check_database_exists, has_integrity_results
 
 def list_database_entries(db_path: Path, verbose: bool = False, verify: bool = False,
                          export_csv: Path = None, export_json: Path = None,
@@ -19,33 +19,23 @@ def list_database_entries(db_path: Path, verbose: bool = False, verify: bool = F
         
         # Validate database structure
         try:
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('passed_files', 'failed_files')")
-            tables = cursor.fetchall()
-            if len(tables) != 2:
-                print("Error: Database structure is invalid. Missing required tables.")
+            if not has_integrity_results(cursor):
                 return
         except sqlite3.Error as e:
             print(f"Error validating database structure: {e}")
             return
         
         # Build query based on filters
-        query = "SELECT * FROM {} WHERE 1=1"
+        query = "SELECT * FROM integrity_results WHERE 1=1"
         params = []
         
         if filter_status:
-            table = "passed_files" if filter_status == "passed" else "failed_files"
-            query = query.format(table)
-        else:
-            # If no status filter, query both tables
-            query = "SELECT *, 'PASSED' as status FROM passed_files UNION ALL SELECT *, 'FAILED' as status FROM failed_files"
+            query += " AND status = ?"
+            params.append(filter_status.upper())
         
         if filter_codec:
-            if filter_status:
-                query += " AND codec = ?"
-                params.append(filter_codec)
-            else:
-                query += " WHERE codec = ?"
-                params.append(filter_codec)
+            query += " AND codec = ?"
+            params.append(filter_codec)
         
         try:
             cursor.execute(query, params)
@@ -60,10 +50,8 @@ def list_database_entries(db_path: Path, verbose: bool = False, verify: bool = F
         
         # Get column names
         try:
-            cursor.execute("PRAGMA table_info(passed_files)")
+            cursor.execute("PRAGMA table_info(integrity_results)")
             columns = [row[1] for row in cursor.fetchall()]
-            if not filter_status:
-                columns.append('status')
         except sqlite3.Error as e:
             print(f"Error getting column information: {e}")
             return
@@ -1,7 +1,7 @@
 import time
 import datetime
 from pathlib import Path
-from .core import check_database_exists, get_database_summary
+from .core import check_database_exists, get_database_summary, has_integrity_results
 import sqlite3
 
 def watch_database(db_path: Path, interval: int = 5):
@@ -47,10 +47,7 @@ def quick_check_database(db_path: Path):
         
         # Validate database structure
         try:
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('passed_files', 'failed_files')")
-            tables = cursor.fetchall()
-            if len(tables) != 2:
-                print("Error: Database structure is invalid. Missing required tables.")
+            if not has_integrity_results(cursor):
                 return
         except sqlite3.Error as e:
             print(f"Error validating database structure: {e}")
@@ -58,51 +55,54 @@ def quick_check_database(db_path: Path):
         
         # Get basic statistics with error handling
         try:
-            cursor.execute("SELECT COUNT(*) FROM passed_files")
-            passed_count = cursor.fetchone()[0]
-            cursor.execute("SELECT COUNT(*) FROM failed_files")
-            failed_count = cursor.fetchone()[0]
+            cursor.execute("SELECT status, COUNT(*) FROM integrity_results GROUP BY status")
+            counts = dict(cursor.fetchall())
+            passed_count = counts.get('PASSED', 0)
+            failed_count = counts.get('FAILED', 0)
             total_count = passed_count + failed_count
         except sqlite3.Error as e:
             print(f"Error getting basic statistics: {e}")
             return
         
-        # Get codec statistics with error handling
+        # Get codec statistics with error handling; served entirely by the (status, codec) index
         try:
             cursor.execute("""
-                SELECT codec, COUNT(*) as count 
-                FROM passed_files 
+                SELECT status, codec, COUNT(*) as count 
+                FROM integrity_results 
                 WHERE codec IS NOT NULL AND codec != 'unknown'
-                GROUP BY codec
+                GROUP BY status, codec
                 ORDER BY count DESC
             """)
-            passed_codecs = cursor.fetchall()
-            
-            cursor.execute("""
-                SELECT codec, COUNT(*) as count 
-                FROM failed_files 
-                WHERE codec IS NOT NULL AND codec != 'unknown'
-                GROUP BY codec
-                ORDER BY count DESC
-            """)
-            failed_codecs = cursor.fetchall()
+            codec_rows = cursor.fetchall()
+            passed_codecs = [(codec, count) for status, codec, count in codec_rows if status == 'PASSED']
+            failed_codecs = [(codec, count) for status, codec, count in codec_rows if status == 'FAILED']
         except sqlite3.Error as e:
             print(f"Error getting codec statistics: {e}")
             passed_codecs = []
             failed_codecs = []
         
-        # Get recent activity with error handling
+        # Failures by kind: truncated or damaged container (structure check) or decode errors
         try:
             cursor.execute("""
-                SELECT COUNT(*) FROM passed_files 
-                WHERE last_checked >= date('now', '-7 days')
+                SELECT COALESCE(error_class, 'unclassified'), COUNT(*) FROM integrity_results
+                WHERE status = 'FAILED'
+                GROUP BY 1
+                ORDER BY 2 DESC
             """)
-            recent_passed = cursor.fetchone()[0]
+            failed_classes = cursor.fetchall()
+        except sqlite3.Error:
+            failed_classes = []  # Database from before error_class was recorded
+
+        # Get recent activity with error handling
+        try:
             cursor.execute("""
-                SELECT COUNT(*) FROM failed_files 
+                SELECT status, COUNT(*) FROM integrity_results 
                 WHERE last_checked >= date('now', '-7 days')
+                GROUP BY status
             """)
-            recent_failed = cursor.fetchone()[0]
+            recent = dict(cursor.fetchall())
+            recent_passed = recent.get('PASSED', 0)
+            recent_failed = recent.get('FAILED', 0)
         except sqlite3.Error as e:
             print(f"Error getting recent activity: {e}")
             recent_passed = 0
@@ -132,6 +132,12 @@ def quick_check_database(db_path: Path):
                 for codec, count in failed_codecs:
                     print(f"  {codec}: {count} files ({count/failed_count*100:.1f}%)")
         
+        if failed_classes:
+            print("\nFailure Classes")
+            print("-" * 50)
+            for error_class, count in failed_classes:
+                print(f"  {error_class}: {count} files ({count/failed_count*100:.1f}%)")
+
         print("\nRecent Activity (Last 7 Days)")
         print("-" * 50)
         print(f"Passed: {recent_passed} files")
@@ -1,81 +1,180 @@
 import sqlite3
 import os
+import threading
 from pathlib import Path
 import datetime
-import hashlib
+from functools import lru_cache
 from typing import Optional, Dict, Any
 from contextlib import contextmanager
+import utils  # Import from root directory
+from .change_detection import file_signature, signature_matches, compute_hashes, content_matches
 
 # Constants for database settings
 TIMEOUT = 60.0  # seconds
 RETRY_COUNT = 3
+CACHED_STATEMENTS = 256  # prepared statements each pooled connection keeps compiled
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024  # bytes
+DEFAULT_CACHE_SIZE = -64 * 1024  # negative values are KiB, as in PRAGMA cache_size
 
 FILE_TRACKING_SCHEMA = """
 CREATE TABLE IF NOT EXISTS file_tracking (
     file_path TEXT PRIMARY KEY,
     last_modified TEXT,
     file_hash TEXT,
-    last_processed TEXT
+    last_processed TEXT,
+    file_size INTEGER,
+    mtime_ns INTEGER,
+    inode INTEGER,
+    partial_hash TEXT,
+    hash_algorithm TEXT,
+    partial_hash_algorithm TEXT
 );
 """
 
+# Columns added after the first release; created on older databases when they are opened
+FILE_TRACKING_COLUMNS = {
+    'file_size': 'INTEGER',
+    'mtime_ns': 'INTEGER',
+    'inode': 'INTEGER',
+    'partial_hash': 'TEXT',
+    'hash_algorithm': 'TEXT',
+    'partial_hash_algorithm': 'TEXT'
+}
+
+# Algorithm of file_tracking hashes stored before rows carried a hash_algorithm tag
+LEGACY_HASH_ALGORITHM = 'sha256'
+
+# Connection pool: one connection per database per thread, rebuilt in a forked worker process
+_pool = threading.local()
+_stats_lock = threading.Lock()
+_connections_opened = 0
+
+@lru_cache(maxsize=None)
+def get_pragma_settings() -> Dict[str, int]:
+    """Get the mmap_size and cache_size PRAGMAs from the 'database' section of the config."""
+    database = utils.load_config().get("database") or {}
+    return {
+        'mmap_size': int(database.get("mmap_size", DEFAULT_MMAP_SIZE)),
+        'cache_size': int(database.get("cache_size", DEFAULT_CACHE_SIZE))
+    }
+
+def get_connection(db_path: Path) -> sqlite3.Connection:
+    """Get this thread's pooled connection to a database, opening and configuring it on first use.
+    Pooled connections stay open for the life of the thread, so their statement cache is reused.
+    """
+    if getattr(_pool, 'pid', None) != os.getpid():
+        _pool.connections = {}
+        _pool.depths = {}  # connection -> number of open transaction scopes
+        _pool.pid = os.getpid()
+    key = os.path.abspath(db_path)
+    conn = _pool.connections.get(key)
+    if conn is None:
+        global _connections_opened
+        conn = sqlite3.connect(db_path, timeout=TIMEOUT, cached_statements=CACHED_STATEMENTS)
+        settings = get_pragma_settings()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA busy_timeout={}".format(int(TIMEOUT * 1000)))  # Convert to milliseconds
+        conn.execute("PRAGMA mmap_size={}".format(settings['mmap_size']))
+        conn.execute("PRAGMA cache_size={}".format(settings['cache_size']))
+        _pool.connections[key] = conn
+        with _stats_lock:
+            _connections_opened += 1
+    return conn
+
+def close_connections():
+    """Close this thread's pooled connections."""
+    for conn in getattr(_pool, 'connections', {}).values():
+        conn.close()
+    _pool.connections = {}
+    _pool.depths = {}
+
+def connections_opened() -> int:
+    """Get the number of pooled connections this process has opened, to spot per-file connections.
+    Worker processes keep their own counts; this is the calling process only.
+    """
+    return _connections_opened
+
 @contextmanager
-def get_db_connection(db_path: Path) -> sqlite3.Connection:
-    """Get a database connection with WAL mode enabled."""
-    conn = sqlite3.connect(db_path, timeout=TIMEOUT)
+def transaction(db_path: Path, immediate: bool = False) -> sqlite3.Connection:
+    """Run a block in one transaction on the pooled connection: commit on success, roll back on error.
+    immediate takes the write lock up front, so a read-then-write block cannot hit SQLITE_BUSY midway.
+    A scope opened inside another on the same connection is a SAVEPOINT: it commits only with the
+    outermost scope, and an error in it rolls back just its own changes.
+    """
+    conn = get_connection(db_path)
+    depths = _pool.depths
+    depth = depths.get(conn, 0)
+    savepoint = f"transaction_{depth}"
+    if depth:
+        conn.execute(f"SAVEPOINT {savepoint}")
+    elif not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    depths[conn] = depth + 1
     try:
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA synchronous=NORMAL")
-        cursor.execute("PRAGMA temp_store=MEMORY")
-        cursor.execute("PRAGMA busy_timeout={}".format(int(TIMEOUT * 1000)))  # Convert to milliseconds
         yield conn
+        if depth:
+            conn.execute(f"RELEASE {savepoint}")
+        else:
+            conn.commit()
+    except BaseException:
+        if depth:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+        else:
+            conn.rollback()
+        raise
     finally:
-        conn.close()
+        depths[conn] = depth
+
+@contextmanager
+def get_db_connection(db_path: Path) -> sqlite3.Connection:
+    """Get the pooled database connection with WAL mode enabled, as a transaction scope."""
+    with transaction(db_path) as conn:
+        yield conn
 
 def init_db_with_wal(db_path: Path, schema: str):
     """Initialize a database with WAL mode and the given schema."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Enable WAL mode
-    cursor.execute("PRAGMA journal_mode=WAL")
-    
-    # Create file tracking table first
-    cursor.execute(FILE_TRACKING_SCHEMA)
-    
-    # Execute each statement in the schema separately
-    for statement in schema.split(';'):
-        if statement.strip():
-            cursor.execute(statement)
-    
-    conn.commit()
-    conn.close()
+    with transaction(db_path) as conn:
+        cursor = conn.cursor()
+
+        # Create file tracking table first
+        cursor.execute(FILE_TRACKING_SCHEMA)
+        ensure_columns(cursor, 'file_tracking', FILE_TRACKING_COLUMNS)
+
+        # Execute each statement in the schema separately
+        for statement in schema.split(';'):
+            if statement.strip():
+                cursor.execute(statement)
+
+def ensure_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]):
+    """Add any of the given columns that an existing table is missing."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, column_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
 
 def get_file_info(file_path: Path) -> Dict[str, Any]:
-    """Get file modification time and hash."""
-    mtime = datetime.datetime.fromtimestamp(os.path.getmtime(file_path))
-    with open(file_path, 'rb') as f:
-        file_hash = hashlib.sha256(f.read()).hexdigest()
-    return {
-        'mtime': mtime.isoformat(),
-        'hash': file_hash
-    }
+    """Get file modification time, stat signature and the hashes the change detection level stores."""
+    info = file_signature(file_path)
+    info['mtime'] = datetime.datetime.fromtimestamp(info['mtime']).isoformat()
+    info.update(compute_hashes(file_path))
+    return info
 
 def needs_processing(db_path: Path, file_path: Path) -> bool:
-    """Check if file needs processing based on mtime and hash."""
+    """Check if file needs processing; unchanged stat signatures never read the file."""
     if not db_path.exists():
         return True
 
     with get_db_connection(db_path) as conn:
         cursor = conn.cursor()
 
-        # Get current file info
-        current_info = get_file_info(file_path)
-        
         # Check if file is tracked
         cursor.execute("""
-        SELECT last_modified, file_hash, last_processed
+        SELECT last_modified, file_hash, last_processed, file_size, mtime_ns, inode, partial_hash, hash_algorithm,
+               partial_hash_algorithm
         FROM file_tracking 
         WHERE file_path = ?
         """, (str(file_path),))
@@ -84,11 +183,26 @@ def needs_processing(db_path: Path, file_path: Path) -> bool:
         if not result:
             return True
 
-        # Compare mtime and hash
-        stored_mtime, stored_hash, last_processed = result
-        if stored_mtime != current_info['mtime'] or stored_hash != current_info['hash']:
-            return True
-            
+        (stored_mtime, stored_hash, last_processed, file_size, mtime_ns, inode, stored_partial, algorithm,
+         partial_algorithm) = result
+        current = file_signature(file_path)
+        if not signature_matches((file_size, mtime_ns, inode), current):
+            current_mtime = datetime.datetime.fromtimestamp(current['mtime']).isoformat()
+            legacy_unchanged = mtime_ns is None and stored_mtime == current_mtime
+            if file_size is not None and file_size != current['file_size']:
+                return True
+            hashes = {}
+            if not legacy_unchanged:
+                matches, hashes = content_matches(file_path, stored_partial, stored_hash,
+                                                  algorithm or LEGACY_HASH_ALGORITHM, partial_algorithm)
+                if not matches:
+                    return True
+            # Same content under a new stat signature: store it, so the next run takes the stat fast path
+            cursor.execute(FILE_TRACKING_REFRESH, (
+                current_mtime, current['file_size'], current['mtime_ns'], current['inode'],
+                hashes.get('partial_hash'), hashes.get('partial_hash_algorithm'), hashes.get('file_hash'),
+                hashes.get('hash_algorithm'), str(file_path)))
+
         # Check if data needs updating (if last processed was more than 24 hours ago)
         last_processed_dt = datetime.datetime.fromisoformat(last_processed)
         now = datetime.datetime.now()
@@ -97,40 +211,30 @@ def needs_processing(db_path: Path, file_path: Path) -> bool:
             
         return False
 
+# Stores the stat signature of a file whose content was found unchanged, plus any hashes
+# content_matches migrated to the current algorithm; last_processed is left alone
+FILE_TRACKING_REFRESH = """
+UPDATE file_tracking
+SET last_modified = ?, file_size = ?, mtime_ns = ?, inode = ?,
+    partial_hash = COALESCE(?, partial_hash), partial_hash_algorithm = COALESCE(?, partial_hash_algorithm),
+    file_hash = COALESCE(?, file_hash), hash_algorithm = COALESCE(?, hash_algorithm)
+WHERE file_path = ?
+"""
+
+FILE_TRACKING_UPSERT = """
+INSERT OR REPLACE INTO file_tracking
+(file_path, last_modified, file_hash, last_processed, file_size, mtime_ns, inode, partial_hash, hash_algorithm,
+ partial_hash_algorithm)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def file_tracking_row(file_path: Path, file_info: Dict[str, Any], now: str) -> tuple:
+    """Build the FILE_TRACKING_UPSERT parameters for a file from its get_file_info result."""
+    return (str(file_path), file_info['mtime'], file_info['file_hash'], now, file_info['file_size'],
+            file_info['mtime_ns'], file_info['inode'], file_info['partial_hash'], file_info['hash_algorithm'],
+            file_info['partial_hash_algorithm'])
+
 def update_file_tracking(conn: sqlite3.Connection, file_path: Path):
     """Update file tracking information in database using existing connection."""
-    cursor = conn.cursor()
-    file_info = get_file_info(file_path)
     now = datetime.datetime.now().isoformat()
-    
-    # Check if file exists in tracking
-    cursor.execute("""
-    SELECT last_modified, file_hash 
-    FROM file_tracking 
-    WHERE file_path = ?
-    """, (str(file_path),))
-    
-    result = cursor.fetchone()
-    if result:
-        stored_mtime, stored_hash = result
-        if stored_mtime == file_info['mtime'] and stored_hash == file_info['hash']:
-            # Only update last_processed if file hasn't changed
-            cursor.execute("""
-            UPDATE file_tracking 
-            SET last_processed = ?
-            WHERE file_path = ?
-            """, (now, str(file_path)))
-        else:
-            # Update all fields if file has changed
-            cursor.execute("""
-            UPDATE file_tracking 
-            SET last_modified = ?, file_hash = ?, last_processed = ?
-            WHERE file_path = ?
-            """, (file_info['mtime'], file_info['hash'], now, str(file_path)))
-    else:
-        # Insert new record
-        cursor.execute("""
-        INSERT INTO file_tracking 
-        (file_path, last_modified, file_hash, last_processed)
-        VALUES (?, ?, ?, ?)
-        """, (str(file_path), file_info['mtime'], file_info['hash'], now)) 
\ No newline at end of file
+    conn.execute(FILE_TRACKING_UPSERT, file_tracking_row(file_path, get_file_info(file_path), now))
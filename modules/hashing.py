@@ -0,0 +1,101 @@
+import os
+import time
+import hashlib
+import threading
+from functools import lru_cache, partial
+from typing import Dict, Iterable
+import utils  # Import from root directory
+
+# Optional fast hashers; hashlib.blake2b is used when neither is installed
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# Large, page-aligned reads keep hashing at disk speed; memory use stays at one buffer per thread
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Registry of hash algorithm names (as stored next to each hash) to hasher factories
+HASH_ALGORITHMS = {
+    'md5': hashlib.md5,
+    'sha256': hashlib.sha256,
+    'blake2b': hashlib.blake2b,
+    'blake2b_128': partial(hashlib.blake2b, digest_size=16),  # untagged partial hashes used this
+}
+if blake3 is not None:
+    HASH_ALGORITHMS['blake3'] = blake3.blake3
+if xxhash is not None:
+    HASH_ALGORITHMS['xxh3_128'] = xxhash.xxh3_128
+
+# Fastest installed algorithm; used for new hashes unless hashing.algorithm is set in the config
+DEFAULT_HASH_ALGORITHM = next(name for name in ('xxh3_128', 'blake3', 'blake2b') if name in HASH_ALGORITHMS)
+
+_buffers = threading.local()
+
+def _get_buffer(size: int) -> bytearray:
+    """Get this thread's reusable read buffer of the given size."""
+    buffer = getattr(_buffers, 'buffer', None)
+    if buffer is None or len(buffer) != size:
+        buffer = bytearray(size)
+        _buffers.buffer = buffer
+    return buffer
+
+@lru_cache(maxsize=None)
+def get_hash_algorithm() -> str:
+    """Get the algorithm used for newly written hashes, honouring a config override."""
+    config = utils.load_config()
+    algorithm = config.get("hashing", {}).get("algorithm")
+    return algorithm if algorithm in HASH_ALGORITHMS else DEFAULT_HASH_ALGORITHM
+
+def new_hasher(algorithm: str = None):
+    """Create a hasher for a registered algorithm name (default: get_hash_algorithm())."""
+    algorithm = algorithm or get_hash_algorithm()
+    if algorithm not in HASH_ALGORITHMS:
+        raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+    return HASH_ALGORITHMS[algorithm]()
+
+def hash_file_multi(file_path: str, algorithms: Iterable[str], chunk_size: int = HASH_CHUNK_SIZE) -> Dict[str, str]:
+    """Hash a file with several algorithms in a single constant-memory read pass."""
+    hashers = {algorithm: new_hasher(algorithm) for algorithm in algorithms}
+    buffer = _get_buffer(chunk_size)
+    view = memoryview(buffer)
+    with open(file_path, 'rb', buffering=0) as f:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            for hasher in hashers.values():
+                hasher.update(view[:read])
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+
+def hash_file(file_path: str, algorithm: str = None, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Hash a file in constant memory by reading into a reusable buffer."""
+    algorithm = algorithm or get_hash_algorithm()
+    return hash_file_multi(file_path, (algorithm,), chunk_size)[algorithm]
+
+def benchmark_hash_algorithms(size_mb: int = 256, chunk_size: int = HASH_CHUNK_SIZE) -> Dict[str, float]:
+    """Measure in-memory hashing throughput in GB/s for every registered algorithm."""
+    chunk = os.urandom(chunk_size)
+    chunks = max(1, size_mb * 1024 * 1024 // chunk_size)
+    results = {}
+    for algorithm in HASH_ALGORITHMS:
+        hasher = new_hasher(algorithm)
+        start = time.perf_counter()
+        for _ in range(chunks):
+            hasher.update(chunk)
+        hasher.hexdigest()
+        elapsed = time.perf_counter() - start
+        results[algorithm] = chunks * chunk_size / elapsed / 1e9
+    return results
+
+if __name__ == "__main__":
+    # Run with: python -m modules.hashing
+    print(f"Algorithm for new hashes: {get_hash_algorithm()} (set hashing.algorithm in the config to override)")
+    for algorithm, speed in sorted(benchmark_hash_algorithms().items(), key=lambda item: -item[1]):
+        print(f"  {algorithm:<10} {speed:6.2f} GB/s")
@@ -2,7 +2,7 @@
 from .lock_utils import acquire_lock, release_lock, LOCK_FILE
 from .file_hash import calculate_file_hash
 from .db_init import initialize_database
-from .determine_action import determine_action
+from .determine_action import determine_action, load_cached_state
 from .check_file import check_single_file
 from .process_file import process_file
 from .db_cleanup import cleanup_database
@@ -0,0 +1,108 @@
+import os
+import mmap
+from typing import List, Optional, Tuple
+from ..hashing import HASH_ALGORITHMS, HASH_CHUNK_SIZE, get_hash_algorithm, new_hasher
+from .quick_verify import flac_audio_start
+from .structure_check import MP4_CONTAINERS, StructureError, mp3_audio_bounds, mp4_atoms, trailing_tags_start
+
+# Header packets before the audio in an Ogg stream, by the signature of the first packet
+OGG_HEADER_PACKETS = {b'OpusHead': 2, b'\x01vorbis': 3}
+
+def flac_spans(data) -> List[Tuple[int, int]]:
+    """The FLAC frames: everything after the metadata blocks (tags, pictures, padding)."""
+    start, _ = flac_audio_start(data)
+    return [(start, trailing_tags_start(data, start))]
+
+def mp3_spans(data) -> List[Tuple[int, int]]:
+    """The MPEG frames between the ID3v2 tag and any ID3v1 or APEv2 tags."""
+    return [mp3_audio_bounds(data)]
+
+def mp4_spans(data) -> List[Tuple[int, int]]:
+    """The sample tables and the payload of every mdat atom. Tags live in moov/udta, and the stco/co64
+    chunk offsets are left out because a tagger rewrites them when moov grows."""
+    spans = []
+    mdat = []
+    stack = [(None, 0, len(data))]
+    while stack:
+        parent, start, end = stack.pop()
+        for kind, offset, header, size in mp4_atoms(data, start, min(end, len(data))):
+            if kind == b'mdat' and parent is None:
+                mdat.append((offset + header, min(offset + size, len(data))))
+            elif kind in MP4_CONTAINERS:
+                stack.append((kind, offset + header, offset + size))
+            elif parent == b'stbl' and kind not in (b'stco', b'co64'):
+                spans.append((offset, min(offset + size, len(data))))
+    if not mdat:
+        raise ValueError("no mdat atom")
+    return spans + mdat
+
+def riff_spans(data) -> List[Tuple[int, int]]:
+    """The body of the RIFF 'data' chunk; LIST/INFO and id3 chunks are skipped."""
+    if data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        raise ValueError("no RIFF/WAVE header")
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_size = int.from_bytes(data[offset + 4:offset + 8], 'little')
+        if data[offset:offset + 4] == b'data':
+            return [(offset + 8, min(offset + 8 + chunk_size, len(data)))]
+        offset += 8 + chunk_size + (chunk_size & 1)
+    raise ValueError("no data chunk")
+
+def ogg_spans(data) -> List[Tuple[int, int]]:
+    """The page bodies after the Opus or Vorbis header packets; page headers are left out because
+    rewriting the comment header can change page sequence numbers and checksums."""
+    header_packets = next((count for signature, count in OGG_HEADER_PACKETS.items()
+                           if data[28:28 + len(signature)] == signature), None)
+    if header_packets is None:
+        raise ValueError("not an Opus or Vorbis stream")
+    spans = []
+    offset = packets = 0
+    while offset + 27 <= len(data) and data[offset:offset + 4] == b'OggS':
+        segments = data[offset + 26]
+        table = data[offset + 27:offset + 27 + segments]
+        body = offset + 27 + segments
+        end = body + sum(table)
+        if packets >= header_packets:
+            spans.append((body, min(end, len(data))))
+        else:
+            packets += sum(1 for lacing in table if lacing < 255)
+        offset = end
+    return spans
+
+# Extension -> function giving the (start, end) byte ranges of the audio payload
+AUDIO_SPANS = {
+    '.flac': flac_spans,
+    '.mp3': mp3_spans,
+    '.m4a': mp4_spans,
+    '.mp4': mp4_spans,
+    '.m4b': mp4_spans,
+    '.wav': riff_spans,
+    '.ogg': ogg_spans,
+    '.oga': ogg_spans,
+    '.opus': ogg_spans,
+}
+
+def audio_hash(file_path: str, algorithm: str = None) -> Optional[str]:
+    """Hash only the audio payload of a file, so tag and artwork edits leave it unchanged.
+    Returns 'algorithm:hexdigest', or None for formats without a payload parser or unparseable files.
+    """
+    spans_of = AUDIO_SPANS.get(os.path.splitext(file_path)[1].lower())
+    if spans_of is None:
+        return None
+    algorithm = algorithm or get_hash_algorithm()
+    hasher = new_hasher(algorithm)
+    try:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            spans = spans_of(data)
+            with memoryview(data) as view:
+                for start, end in spans:
+                    for chunk_start in range(start, end, HASH_CHUNK_SIZE):
+                        hasher.update(view[chunk_start:min(end, chunk_start + HASH_CHUNK_SIZE)])
+    except (OSError, ValueError, IndexError, StructureError):
+        return None  # Empty or unparseable; such files are always decoded
+    return f"{algorithm}:{hasher.hexdigest()}"
+
+def audio_hash_matches(file_path: str, stored: str) -> bool:
+    """Check a stored audio hash against the file, using the algorithm it was computed with."""
+    algorithm = stored.partition(':')[0]
+    return algorithm in HASH_ALGORITHMS and audio_hash(file_path, algorithm) == stored
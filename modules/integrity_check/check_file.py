@@ -1,5 +1,18 @@
+import re
 import subprocess
 from typing import Tuple
+from ..probe_cache import probe_file, get_audio_stream
+
+# Log levels that FFmpeg uses for decode problems (matches the old '-v error' output)
+ERROR_LEVELS = {'error', 'fatal', 'panic'}
+LOG_LEVEL_PATTERN = re.compile(r'\[(trace|debug|verbose|info|warning|error|fatal|panic)\] ')
+DURATION_PATTERN = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+BITRATE_PATTERN = re.compile(r'bitrate: (\d+) kb/s')
+AUDIO_STREAM_PATTERN = re.compile(r'Stream #\d+:\d+.*: Audio: ')
+RAW_BITS_PATTERN = re.compile(r'\((\d+) bit\)')
+SAMPLE_FMT_PATTERN = re.compile(r'[su](\d+)p?\b')
+CHANNEL_LAYOUTS = {'mono': 1, 'stereo': 2, '2.1': 3, 'quad': 4, '4.0': 4, '5.0': 5, '5.1': 6,
+                   '5.0(side)': 5, '5.1(side)': 6, '6.1': 7, '7.1': 8}
 
 def normalize_codec(codec: str) -> Tuple[str, str]:
     """Normalize codec names to a standard format and categorize them.
@@ -68,36 +81,92 @@ def normalize_codec(codec: str) -> Tuple[str, str]:
     return codec_map.get(codec, (codec, 'unknown'))
 
 def get_codec(file_path: str) -> str:
-    """Get the codec of an audio file using ffprobe."""
+    """Get the codec of an audio file using cached ffprobe data."""
     try:
-        result = subprocess.run(
-            ['ffprobe', '-v', 'error', '-select_streams', 'a:0', 
-             '-show_entries', 'stream=codec_name', 
-             '-of', 'default=noprint_wrappers=1:nokey=1', file_path],
-            capture_output=True, text=True, timeout=10
-        )
-        codec = result.stdout.strip() if result.stdout else "unknown"
+        stream = get_audio_stream(probe_file(file_path))
+        codec = stream.get("codec_name", "unknown") if stream else "unknown"
         normalized_codec, _ = normalize_codec(codec)
         return normalized_codec
     except Exception:
         return "unknown"
 
-def check_single_file(file_path: str) -> tuple:
-    """Check the integrity of a single audio file using FFmpeg with timeout."""
+def parse_ffmpeg_log(stderr: str) -> Tuple[list, dict]:
+    """Split an ffmpeg log written with '-loglevel level+info' into decode errors and stream info.
+    Returns a tuple of (error_lines, stream_info) where stream_info describes the first input audio stream.
+    """
+    errors = []
+    stream_info = {}
+    in_output = False
+    for line in stderr.splitlines():
+        level = LOG_LEVEL_PATTERN.search(line)
+        if level and level.group(1) in ERROR_LEVELS:
+            errors.append((line[:level.start()] + line[level.end():]).strip())
+            continue
+        if 'Output #' in line:
+            in_output = True
+        if in_output:
+            continue
+        if 'Duration:' in line:
+            duration = DURATION_PATTERN.search(line)
+            if duration:
+                hours, minutes, seconds = duration.groups()
+                stream_info['duration'] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+            bit_rate = BITRATE_PATTERN.search(line)
+            if bit_rate:
+                stream_info['bit_rate'] = int(bit_rate.group(1)) * 1000
+            continue
+        if 'codec' not in stream_info and AUDIO_STREAM_PATTERN.search(line):
+            stream_info.update(parse_audio_stream(line))
+    return errors, stream_info
+
+def parse_audio_stream(line: str) -> dict:
+    """Parse an ffmpeg 'Stream #0:0: Audio: ...' banner line into codec and stream parameters."""
+    parts = [part.strip() for part in line.split('Audio:', 1)[1].split(',')]
+    info = {'codec': parts[0].split(' ')[0] if parts[0] else 'unknown'}
+    for part in parts[1:]:
+        if part.endswith(' Hz'):
+            info['sample_rate'] = int(part[:-3])
+        elif 'kb/s' in part:
+            continue
+        elif 'channels' not in info:
+            layout = part.split(' ')[0]
+            info['channels'] = CHANNEL_LAYOUTS.get(part, int(layout) if layout.isdigit() else 0)
+        elif 'bit_depth' not in info:
+            bits = RAW_BITS_PATTERN.search(part) or SAMPLE_FMT_PATTERN.match(part)
+            if bits:
+                info['bit_depth'] = int(bits.group(1))
+    return info
+
+def verify_file(file_path: str) -> dict:
+    """Decode an audio file once with FFmpeg, collecting decode errors, codec and stream parameters.
+    The stream banner is parsed from the same ffmpeg run so no separate ffprobe is needed.
+    """
     try:
-        # First check integrity
         result = subprocess.run(
-            ['ffmpeg', '-v', 'error', '-i', file_path, '-f', 'null', '-'],
-            capture_output=True, text=True, timeout=30
+            ['ffmpeg', '-hide_banner', '-nostdin', '-nostats', '-loglevel', 'level+info',
+             '-i', file_path, '-f', 'null', '-'],
+            capture_output=True, text=True, errors='replace', timeout=30
         )
-        
-        # Get codec information
-        codec = get_codec(file_path)
-        
-        status = "PASSED" if not result.stderr else "FAILED"
-        message = "" if not result.stderr else result.stderr.strip()
-        return status, message, file_path, codec
+        errors, stream_info = parse_ffmpeg_log(result.stderr)
+        if result.returncode != 0 and not errors:
+            errors.append(f"FFmpeg exited with code {result.returncode}")
+        codec, codec_type = normalize_codec(stream_info.get('codec', 'unknown'))
+        stream_info.update({
+            'status': "PASSED" if not errors else "FAILED",
+            'message': "\n".join(errors),
+            'file_path': file_path,
+            'codec': codec,
+            'codec_type': codec_type
+        })
+        return stream_info
     except subprocess.TimeoutExpired:
-        return "FAILED", "FFmpeg timed out", file_path, "unknown"
+        message = "FFmpeg timed out"
     except Exception as e:
-        return "FAILED", str(e), file_path, "unknown"
\ No newline at end of file
+        message = str(e)
+    return {'status': "FAILED", 'message': message, 'file_path': file_path,
+            'codec': "unknown", 'codec_type': "unknown"}
+
+def check_single_file(file_path: str) -> tuple:
+    """Check the integrity of a single audio file using a single FFmpeg run with timeout."""
+    result = verify_file(file_path)
+    return result['status'], result['message'], file_path, result['codec']
@@ -1,27 +1,72 @@
 from pathlib import Path
 import os
+import sys
 import datetime
-import sqlite3
-import concurrent.futures
+import itertools
 from tqdm import tqdm
 import utils
 from .db_init import initialize_database
+from .determine_action import load_cached_state, determine_action
 from .process_file import process_file
 from .db_cleanup import cleanup_database
-from .lock_utils import acquire_lock, release_lock, LOCK_FILE
+from .db_writer import start_db_writer, stop_db_writer
+from .pipeline import run_pipeline, cached_result
+
+def iter_targets(directory: str, scan_options: dict, seen_paths: set = None):
+    """Yield (file_path, stat_result) for every audio file under a directory as the walk finds it.
+    Paths are absolute, the form the database and the watcher store them in, and are also added to
+    seen_paths, if given, for the cleanup after the walk.
+    """
+    for entry in utils.iter_audio_entries(os.path.abspath(directory), **scan_options):
+        try:
+            yield entry.path, entry.stat()
+        except OSError:
+            continue
+        if seen_paths is not None:
+            seen_paths.add(entry.path)
+
+def handle_result(result: tuple, counts: dict, log_files: dict, write_queue, verbose: bool):
+    """Count and log a result as it arrives and hand it to the database writer.
+    Files that could not be checked at all (ERROR) are always reported, on stderr unless verbose,
+    and are logged with the failures but not stored.
+    """
+    action, status, message, file_path, _ = result
+    if action == 'ERROR':
+        counts['ERROR'] = counts.get('ERROR', 0) + 1
+        error_line = f"ERROR {file_path}: {message}"
+        if verbose:
+            print(error_line)
+        else:
+            tqdm.write(error_line, file=sys.stderr)
+        if log_files:
+            log_files['ERROR'].write(error_line + "\n")
+        return
+    counts[status] = counts.get(status, 0) + 1
+    result_line = f"{status} {file_path}" + (f": {message}" if message else "")
+    if verbose:
+        print(result_line)
+    if log_files:
+        log_files[status].write(result_line + "\n")
+    if action != 'USE_CACHED':
+        write_queue.put(result)
 
 def check_integrity(args):
-    """Handle the 'check' command with concurrent database access."""
+    """Handle the 'check' command as a pipeline of walk, hash and decode stages feeding one DB writer."""
     if not utils.is_ffmpeg_installed():
         print("Error: FFmpeg is not installed or not in your PATH.")
         return
 
-    path = args.path
+    # Rows are keyed by absolute path, so relative and absolute spellings of a file share one row
+    path = os.path.abspath(args.path)
     verbose = getattr(args, 'verbose', False)
     summary = getattr(args, 'summary', False)
     save_log = getattr(args, 'save_log', False)
     force_recheck = getattr(args, 'recheck', False)
+    quick = getattr(args, 'quick', False)
     num_workers = args.workers if args.workers is not None else (os.cpu_count() or 4)
+    # Hashing is I/O-bound and decoding is CPU-bound, so each stage gets its own thread count
+    decode_workers = getattr(args, 'decode_workers', None) or num_workers
+    hash_workers = getattr(args, 'hash_workers', None) or min(4, num_workers)
     config = utils.load_config()
 
     cache_folder = Path(config.get("cache_folder", "cache log"))
@@ -31,187 +76,80 @@ def check_integrity(args):
 
     initialize_database(db_path)
 
-    if os.path.isfile(path) and os.path.splitext(path)[1].lower() in utils.AUDIO_EXTENSIONS:
-        audio_files = [path]
+    seen_paths = None
+    if os.path.isfile(path) and utils.is_audio_file(path):
+        targets = iter([(path, None)])
     elif os.path.isdir(path):
-        audio_files = utils.get_audio_files(path)
-        if not audio_files:
-            print(f"No audio files found in '{path}'.")
-            return
+        seen_paths = set()
+        targets = iter_targets(path, utils.get_scan_options(config), seen_paths)
     else:
         print(f"'{path}' is not a file or directory.")
         return
 
-    create_log = save_log or (not verbose and not summary)
-    if create_log:
+    # Peek so an empty tree is reported before any log files are created
+    first_target = next(targets, None)
+    if first_target is None:
+        print(f"No audio files found in '{path}'.")
+        return
+    targets = itertools.chain([first_target], targets)
+
+    output = getattr(args, 'output', None)
+    create_log = not output and (save_log or (not verbose and not summary))
+    if output:
+        output_file = open(output, 'w', encoding='utf-8')
+        log_files = {'PASSED': output_file, 'FAILED': output_file, 'ERROR': output_file}
+    elif create_log:
         timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
         failed_log_filename = log_folder / f"Failed-{timestamp}.txt"
         success_log_filename = log_folder / f"Success-{timestamp}.txt"
         failed_log_file = open(failed_log_filename, 'w', encoding='utf-8')
         success_log_file = open(success_log_filename, 'w', encoding='utf-8')
+        log_files = {'PASSED': success_log_file, 'FAILED': failed_log_file, 'ERROR': failed_log_file}
     else:
-        failed_log_file = None
-        success_log_file = None
+        log_files = None
 
-    total_files = len(audio_files)
+    counts = {'PASSED': 0, 'FAILED': 0, 'ERROR': 0}
+    # The walk, cache filter, hashing and decoding overlap; only unchanged files skip the later stages
+    cached_state = load_cached_state(db_path)
+    write_queue, writer = start_db_writer(db_path)
+    try:
+        if verbose:
+            for file_path, stat_result in targets:
+                action, stored_status, cached, signature = determine_action(
+                    file_path, cached_state.get(file_path), force_recheck, stat_result)
+                if action == 'FILE_NOT_FOUND':
+                    continue
+                result = cached_result(action, stored_status, file_path, signature)
+                if result is None:
+                    result = process_file(file_path, action, stored_status, cached, signature, quick)
+                handle_result(result, counts, log_files, write_queue, verbose)
+        else:
+            results = run_pipeline(targets, cached_state, force_recheck, hash_workers, decode_workers,
+                                   quick=quick)
+            for result in tqdm(results, desc="Processing files", unit="file"):
+                handle_result(result, counts, log_files, write_queue, verbose)
+        del cached_state
+    finally:
+        stop_db_writer(write_queue, writer)
 
-    if verbose:
-        all_results = []
-        for file_path in audio_files:
-            action, status, message, _, extra = process_file(db_path, file_path, force_recheck)
-            if action in ['USE_CACHED', 'UPDATE_MTIME', 'RUN_FFMPEG']:
-                all_results.append((status, message, file_path))
-                result_line = f"{status} {file_path}" + (f": {message}" if message else "")
-                print(result_line)
-                if create_log:
-                    (success_log_file if status == "PASSED" else failed_log_file).write(result_line + "\n")
-            if action == 'UPDATE_MTIME':
-                lock_fd = acquire_lock(LOCK_FILE)
-                try:
-                    conn = sqlite3.connect(db_path, timeout=5)
-                    cursor = conn.cursor()
-                    table = 'passed_files' if status == 'PASSED' else 'failed_files'
-                    cursor.execute(f"UPDATE {table} SET mtime = ? WHERE file_path = ?", (extra, file_path))
-                    conn.commit()
-                    conn.close()
-                finally:
-                    release_lock(lock_fd)
-            elif action == 'RUN_FFMPEG':
-                lock_fd = acquire_lock(LOCK_FILE)
-                try:
-                    conn = sqlite3.connect(db_path, timeout=5)
-                    cursor = conn.cursor()
-                    file_path, file_hash, mtime, status, codec = extra
-                    if status == 'PASSED':
-                        cursor.execute("DELETE FROM failed_files WHERE file_path = ?", (file_path,))
-                        table = 'passed_files'
-                    else:
-                        cursor.execute("DELETE FROM passed_files WHERE file_path = ?", (file_path,))
-                        table = 'failed_files'
-                    cursor.execute(f'''
-                        INSERT OR REPLACE INTO {table} (file_path, file_hash, mtime, status, last_checked, codec)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (file_path, file_hash, mtime, status, datetime.datetime.now().isoformat(), codec))
-                    conn.commit()
-                    conn.close()
-                finally:
-                    release_lock(lock_fd)
+    if seen_paths is not None:
+        cleanup_database(db_path, path, seen_paths)
+        del seen_paths
     else:
-        all_results = []
-        mtime_updates_passed = []
-        mtime_updates_failed = []
-        db_updates_passed = []
-        db_updates_failed = []
-        processed_count = 0
-
-        with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
-            futures = [executor.submit(process_file, db_path, file, force_recheck) for file in audio_files]
-            with tqdm(total=len(futures), desc="Processing files") as pbar:
-                for future in concurrent.futures.as_completed(futures):
-                    result = future.result()
-                    action, status, message, file_path, extra = result
-                    if action == 'USE_CACHED':
-                        all_results.append((status, message, file_path))
-                    elif action == 'UPDATE_MTIME':
-                        stored_status = status
-                        current_mtime = extra
-                        all_results.append((stored_status, message, file_path))
-                        if stored_status == 'PASSED':
-                            mtime_updates_passed.append((file_path, current_mtime))
-                        else:
-                            mtime_updates_failed.append((file_path, current_mtime))
-                    elif action == 'RUN_FFMPEG':
-                        update_info = extra
-                        all_results.append((status, message, file_path))
-                        if status == 'PASSED':
-                            db_updates_passed.append(update_info)
-                        else:
-                            db_updates_failed.append(update_info)
-                    pbar.update(1)
-                    processed_count += 1
-
-                    if processed_count % 100 == 0:
-                        lock_fd = acquire_lock(LOCK_FILE)
-                        try:
-                            conn = sqlite3.connect(db_path, timeout=5)
-                            cursor = conn.cursor()
-                            if mtime_updates_passed:
-                                cursor.executemany("UPDATE passed_files SET mtime = ? WHERE file_path = ?",
-                                                   mtime_updates_passed)
-                                mtime_updates_passed = []
-                            if mtime_updates_failed:
-                                cursor.executemany("UPDATE failed_files SET mtime = ? WHERE file_path = ?",
-                                                   mtime_updates_failed)
-                                mtime_updates_failed = []
-                            if db_updates_passed:
-                                for file_path, _, _, _ in db_updates_passed:
-                                    cursor.execute("DELETE FROM failed_files WHERE file_path = ?", (file_path,))
-                                cursor.executemany('''
-                                    INSERT OR REPLACE INTO passed_files (file_path, file_hash, mtime, status, last_checked, codec)
-                                    VALUES (?, ?, ?, ?, ?, ?)
-                                ''', [(fp, fh, mt, st, datetime.datetime.now().isoformat(), codec)
-                                      for fp, fh, mt, st, codec in db_updates_passed])
-                                db_updates_passed = []
-                            if db_updates_failed:
-                                for file_path, _, _, _ in db_updates_failed:
-                                    cursor.execute("DELETE FROM passed_files WHERE file_path = ?", (file_path,))
-                                cursor.executemany('''
-                                    INSERT OR REPLACE INTO failed_files (file_path, file_hash, mtime, status, last_checked, codec)
-                                    VALUES (?, ?, ?, ?, ?, ?)
-                                ''', [(fp, fh, mt, st, datetime.datetime.now().isoformat(), codec)
-                                      for fp, fh, mt, st, codec in db_updates_failed])
-                                db_updates_failed = []
-                            conn.commit()
-                            conn.close()
-                        finally:
-                            release_lock(lock_fd)
-
-        if mtime_updates_passed or mtime_updates_failed or db_updates_passed or db_updates_failed:
-            lock_fd = acquire_lock(LOCK_FILE)
-            try:
-                conn = sqlite3.connect(db_path, timeout=5)
-                cursor = conn.cursor()
-                if mtime_updates_passed:
-                    cursor.executemany("UPDATE passed_files SET mtime = ? WHERE file_path = ?",
-                                       mtime_updates_passed)
-                if mtime_updates_failed:
-                    cursor.executemany("UPDATE failed_files SET mtime = ? WHERE file_path = ?",
-                                       mtime_updates_failed)
-                if db_updates_passed:
-                    for file_path, _, _, _ in db_updates_passed:
-                        cursor.execute("DELETE FROM failed_files WHERE file_path = ?", (file_path,))
-                    cursor.executemany('''
-                        INSERT OR REPLACE INTO passed_files (file_path, file_hash, mtime, status, last_checked, codec)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', [(fp, fh, mt, st, datetime.datetime.now().isoformat(), codec)
-                          for fp, fh, mt, st, codec in db_updates_passed])
-                if db_updates_failed:
-                    for file_path, _, _, _ in db_updates_failed:
-                        cursor.execute("DELETE FROM passed_files WHERE file_path = ?", (file_path,))
-                    cursor.executemany('''
-                        INSERT OR REPLACE INTO failed_files (file_path, file_hash, mtime, status, last_checked, codec)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', [(fp, fh, mt, st, datetime.datetime.now().isoformat(), codec)
-                          for fp, fh, mt, st, codec in db_updates_failed])
-                conn.commit()
-                conn.close()
-            finally:
-                release_lock(lock_fd)
-
-    cleanup_database(db_path)
-
-    passed_count = sum(1 for status, _, _ in all_results if status == "PASSED")
-    failed_count = sum(1 for status, _, _ in all_results if status == "FAILED")
+        cleanup_database(db_path)
 
-    if create_log and not verbose:
-        for status, message, file_path in all_results:
-            result_line = f"{status} {file_path}" + (f": {message}" if message else "")
-            (success_log_file if status == "PASSED" else failed_log_file).write(result_line + "\n")
+    passed_count, failed_count, error_count = counts['PASSED'], counts['FAILED'], counts['ERROR']
+    total_files = passed_count + failed_count + error_count
 
-    summary_text = f"\nSummary:\nTotal files: {total_files}\nPassed: {passed_count}\nFailed: {failed_count}\n"
+    summary_text = (f"\nSummary:\nTotal files: {total_files}\nPassed: {passed_count}\nFailed: {failed_count}\n"
+                    f"Errors: {error_count}\n")
     if verbose or summary:
         print(summary_text)
-    if create_log:
+    if output:
+        output_file.write(summary_text)
+        output_file.close()
+        print(f"Check complete. Results saved to '{output}'")
+    elif create_log:
         failed_log_file.write(summary_text)
         success_log_file.write(summary_text)
         failed_log_file.close()
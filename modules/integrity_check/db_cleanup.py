@@ -1,20 +1,57 @@
 from pathlib import Path
+from typing import Iterable
+import concurrent.futures
 import sqlite3
 import os
-from .lock_utils import acquire_lock, release_lock, LOCK_FILE
+from ..bounded_executor import bounded_as_completed, window_size
 
-def cleanup_database(db_path: Path):
-    """Remove database entries for files that no longer exist with locking."""
-    lock_fd = acquire_lock(LOCK_FILE)
+CLEANUP_TABLES = ['integrity_results']
+CLEANUP_BATCH_SIZE = 1000  # rows deleted per transaction
+EXISTS_WORKERS = 32  # existence checks are network round trips on NAS mounts, not CPU work
+
+def _missing_path(file_path: str):
+    """Return file_path if it no longer exists, else None."""
+    return None if os.path.exists(file_path) else file_path
+
+def cleanup_database(db_path: Path, scanned_root: str = None, seen_paths: Iterable[str] = None):
+    """Remove database entries for files that no longer exist.
+    With scanned_root, only rows under that directory are considered; rows elsewhere belong to other
+    checks and are left alone. When a walk of scanned_root just found seen_paths, those rows are
+    reconciled as a set difference against them, so only the rows the walk did not see are checked
+    on disk, in parallel.
+    """
+    conn = sqlite3.connect(db_path, timeout=60)
     try:
-        conn = sqlite3.connect(db_path, timeout=5)
-        cursor = conn.cursor()
-        for table in ['passed_files', 'failed_files']:
-            cursor.execute(f"SELECT file_path FROM {table}")
-            for (file_path,) in cursor.fetchall():
-                if not os.path.exists(file_path):
-                    cursor.execute(f"DELETE FROM {table} WHERE file_path = ?", (file_path,))
-        conn.commit()
-        conn.close()
+        candidates = []
+        if scanned_root is not None:
+            # Every path under the root sorts between "root/" and "root0" ('0' follows the separator)
+            prefix = scanned_root.rstrip(os.sep) + os.sep
+            bounds = (prefix, prefix[:-1] + chr(ord(os.sep) + 1))
+            unseen = ""
+            if seen_paths is not None:
+                conn.execute("CREATE TEMP TABLE seen_paths (file_path TEXT PRIMARY KEY)")
+                conn.executemany("INSERT OR IGNORE INTO temp.seen_paths VALUES (?)", ((p,) for p in seen_paths))
+                # Unseen rows under the root are usually deleted files, but may sit in hidden or pruned folders
+                unseen = "AND file_path NOT IN (SELECT file_path FROM temp.seen_paths)"
+            for table in CLEANUP_TABLES:
+                candidates += [row[0] for row in conn.execute(f"""
+                    SELECT file_path FROM {table}
+                    WHERE file_path >= ? AND file_path < ? {unseen}
+                """, bounds)]
+            if seen_paths is not None:
+                conn.execute("DROP TABLE temp.seen_paths")
+        else:
+            for table in CLEANUP_TABLES:
+                candidates += [row[0] for row in conn.execute(f"SELECT file_path FROM {table}")]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=EXISTS_WORKERS) as executor:
+            checks = bounded_as_completed(executor, _missing_path, candidates, window_size(EXISTS_WORKERS))
+            missing = [(future.result(),) for future, _ in checks if future.result() is not None]
+
+        for start in range(0, len(missing), CLEANUP_BATCH_SIZE):
+            batch = missing[start:start + CLEANUP_BATCH_SIZE]
+            with conn:
+                for table in CLEANUP_TABLES:
+                    conn.executemany(f"DELETE FROM {table} WHERE file_path = ?", batch)
     finally:
-        release_lock(lock_fd)
\ No newline at end of file
+        conn.close()
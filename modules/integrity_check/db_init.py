@@ -1,32 +1,128 @@
 from pathlib import Path
+import os
 import sqlite3
+from ..database_utils import ensure_columns
+
+INTEGRITY_RESULTS_COLUMNS = [
+    'file_path', 'status', 'file_hash', 'hash_algorithm', 'mtime', 'last_checked', 'codec', 'codec_type',
+    'error_message', 'file_size', 'mtime_ns', 'inode', 'partial_hash', 'error_class',
+    'audio_hash', 'partial_hash_algorithm'
+]
+
+# Columns added after integrity_results was introduced, for ensure_columns on existing databases
+INTEGRITY_RESULTS_ADDED_COLUMNS = {'error_class': 'TEXT', 'audio_hash': 'TEXT', 'partial_hash_algorithm': 'TEXT'}
+
+# One row per file; status is 'PASSED' or 'FAILED'. The covering (status, codec) index serves
+# the per-status and per-codec counts, and the views keep readers of the old two-table layout working
+INTEGRITY_RESULTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS integrity_results (
+    file_path TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    file_hash TEXT,
+    hash_algorithm TEXT,
+    mtime REAL,
+    last_checked TEXT,
+    codec TEXT,
+    codec_type TEXT,
+    error_message TEXT,
+    file_size INTEGER,
+    mtime_ns INTEGER,
+    inode INTEGER,
+    partial_hash TEXT,
+    error_class TEXT,
+    audio_hash TEXT,
+    partial_hash_algorithm TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_integrity_results_status_codec ON integrity_results (status, codec);
+CREATE INDEX IF NOT EXISTS idx_integrity_results_last_checked ON integrity_results (last_checked);
+CREATE VIEW IF NOT EXISTS passed_files AS SELECT * FROM integrity_results WHERE status = 'PASSED';
+CREATE VIEW IF NOT EXISTS failed_files AS SELECT * FROM integrity_results WHERE status = 'FAILED';
+"""
+
+LEGACY_TABLES = {'passed_files': 'PASSED', 'failed_files': 'FAILED'}
+
+def migrate_integrity_tables(conn: sqlite3.Connection) -> bool:
+    """Move rows from the old passed_files/failed_files tables into integrity_results and replace the
+    tables with views, in one transaction so concurrent readers see either layout, never a mix.
+    Returns True if anything was migrated.
+    """
+    legacy = [name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('passed_files', 'failed_files')")]
+    if not legacy:
+        return False
+
+    statements = [statement.strip() for statement in INTEGRITY_RESULTS_SCHEMA.split(';') if statement.strip()]
+    views = [statement for statement in statements if statement.startswith('CREATE VIEW')]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for statement in statements:
+            if statement not in views:
+                conn.execute(statement)
+        ensure_columns(conn.cursor(), 'integrity_results', INTEGRITY_RESULTS_ADDED_COLUMNS)
+        selects = []
+        for table in legacy:
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            values = []
+            for column in INTEGRITY_RESULTS_COLUMNS:
+                if column == 'status':
+                    values.append(f"'{LEGACY_TABLES[table]}'")
+                elif column in existing:
+                    values.append(column)
+                elif column == 'file_hash' and 'md5_hash' in existing:
+                    values.append('md5_hash')  # The first check command stored MD5 under its own name
+                elif column == 'hash_algorithm' and ('file_hash' in existing or 'md5_hash' in existing):
+                    values.append("'md5'")
+                else:
+                    values.append('NULL')
+            selects.append(f"SELECT {', '.join(values)} FROM {table}")
+        # Oldest first, so a path found in both tables keeps its most recent result
+        conn.execute(f"""
+            INSERT OR REPLACE INTO integrity_results ({', '.join(INTEGRITY_RESULTS_COLUMNS)})
+            SELECT * FROM ({' UNION ALL '.join(selects)}) ORDER BY last_checked
+        """)
+        for table in legacy:
+            conn.execute(f"DROP TABLE {table}")
+        for statement in views:
+            conn.execute(statement)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return True
+
+def absolutize_paths(conn: sqlite3.Connection) -> int:
+    """Rewrite rows stored under a relative path, as check did before it normalized paths, to the
+    absolute path. The database lives under the working directory's cache folder, so that is what
+    they were relative to. Where an absolute row already exists, it is newer and the relative one is dropped.
+    Returns the number of rows rewritten or dropped.
+    """
+    # Absolute POSIX paths all sort from '/' up to '0', so the primary key index skips them
+    relative = [file_path for (file_path,) in conn.execute(
+        "SELECT file_path FROM integrity_results WHERE file_path < '/' OR file_path >= '0'")
+        if not os.path.isabs(file_path)]
+    if not relative:
+        return 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany("UPDATE OR IGNORE integrity_results SET file_path = ? WHERE file_path = ?",
+                         ((os.path.abspath(file_path), file_path) for file_path in relative))
+        conn.executemany("DELETE FROM integrity_results WHERE file_path = ?", ((file_path,) for file_path in relative))
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return len(relative)
 
 def initialize_database(db_path: Path):
-    """Initialize the SQLite database with WAL mode and busy timeout."""
+    """Initialize the SQLite database with WAL mode, migrating the old two-table layout if present."""
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path, timeout=5)
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA journal_mode=WAL")
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS passed_files (
-            file_path TEXT PRIMARY KEY,
-            file_hash TEXT,
-            mtime REAL,
-            status TEXT,
-            last_checked TEXT,
-            codec TEXT
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS failed_files (
-            file_path TEXT PRIMARY KEY,
-            file_hash TEXT,
-            mtime REAL,
-            status TEXT,
-            last_checked TEXT,
-            codec TEXT
-        )
-    ''')
-    conn.commit()
+    conn = sqlite3.connect(db_path, timeout=5, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    if migrate_integrity_tables(conn):
+        print(f"Migrated passed_files/failed_files into integrity_results in: {db_path}")
+    conn.executescript(INTEGRITY_RESULTS_SCHEMA)
+    ensure_columns(conn.cursor(), 'integrity_results', INTEGRITY_RESULTS_ADDED_COLUMNS)
+    if absolutize_paths(conn):
+        print(f"Converted relative file paths to absolute paths in: {db_path}")
     conn.close()
-    print(f"Database initialized with WAL mode at: {db_path}")
\ No newline at end of file
+    print(f"Database initialized with WAL mode at: {db_path}")
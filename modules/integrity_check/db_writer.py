@@ -0,0 +1,110 @@
+from pathlib import Path
+import datetime
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# Results are committed in batches of this size, or sooner when the queue goes idle
+WRITER_BATCH_SIZE = 500
+WRITER_IDLE_FLUSH = 1.0  # seconds
+WRITER_MAX_DELAY = 5.0  # seconds a result may wait when a slow, steady stream never goes idle
+
+_STOP = object()
+
+def start_db_writer(db_path: Path, batch_size: int = WRITER_BATCH_SIZE) -> tuple:
+    """Start the single writer thread that owns every write to the integrity database.
+    Returns (write_queue, thread); put process_file results on the queue.
+    """
+    write_queue = queue.Queue()
+    thread = threading.Thread(target=_writer_loop, args=(db_path, write_queue, batch_size),
+                              name="integrity-db-writer", daemon=True)
+    thread.start()
+    return write_queue, thread
+
+def stop_db_writer(write_queue: queue.Queue, thread: threading.Thread):
+    """Flush pending results and wait for the writer thread to finish."""
+    write_queue.put(_STOP)
+    thread.join()
+
+def _writer_loop(db_path: Path, write_queue: queue.Queue, batch_size: int):
+    """Drain the queue and apply results in batched transactions on one connection."""
+    conn = sqlite3.connect(db_path, timeout=60)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    pending = []
+    first_pending = 0.0
+    try:
+        while True:
+            try:
+                item = write_queue.get(timeout=WRITER_IDLE_FLUSH)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            if item is not None:
+                if not pending:
+                    first_pending = time.monotonic()
+                pending.append(item)
+            if pending and (item is None or len(pending) >= batch_size
+                            or time.monotonic() - first_pending >= WRITER_MAX_DELAY):
+                _write_batch(conn, pending)
+                pending = []
+        if pending:
+            _write_batch(conn, pending)
+    finally:
+        conn.close()
+
+def _write_batch(conn: sqlite3.Connection, results: list):
+    """Apply a batch of process_file results in a single transaction.
+    DELETE and DELETE_TREE results remove the rows of a deleted file or directory.
+    """
+    deletions = []
+    tree_deletions = []
+    mtime_updates = []
+    replacements = []
+    now = datetime.datetime.now().isoformat()
+    for action, status, message, file_path, info in results:
+        file_path = os.path.abspath(file_path)  # Rows are keyed by absolute path (see iter_targets)
+        if action == 'DELETE':
+            deletions.append((file_path,))
+        elif action == 'DELETE_TREE':
+            # Every path under the directory sorts between "dir/" and "dir0" ('0' follows the separator)
+            prefix = file_path.rstrip(os.sep) + os.sep
+            tree_deletions.append((prefix, prefix[:-1] + chr(ord(os.sep) + 1)))
+        elif action == 'UPDATE_MTIME':
+            mtime_updates.append((info['mtime'], info['file_size'], info['mtime_ns'], info['inode'],
+                                  info['partial_hash'], info.get('partial_hash_algorithm'), info['file_hash'],
+                                  info['hash_algorithm'], info.get('audio_hash'), file_path))
+        elif action == 'RUN_FFMPEG':
+            replacements.append((file_path, info['status'], info['file_hash'], info['hash_algorithm'], info['mtime'],
+                                 now, info['codec'], info.get('codec_type'), message or None, info['file_size'],
+                                 info['mtime_ns'], info['inode'], info['partial_hash'], info.get('error_class'),
+                                 info.get('audio_hash'), info.get('partial_hash_algorithm')))
+    try:
+        with conn:
+            if deletions:
+                conn.executemany("DELETE FROM integrity_results WHERE file_path = ?", deletions)
+            if tree_deletions:
+                conn.executemany("DELETE FROM integrity_results WHERE file_path >= ? AND file_path < ?", tree_deletions)
+            if mtime_updates:
+                conn.executemany("""
+                    UPDATE integrity_results
+                    SET mtime = ?, file_size = ?, mtime_ns = ?, inode = ?,
+                        partial_hash = COALESCE(?, partial_hash),
+                        partial_hash_algorithm = COALESCE(?, partial_hash_algorithm), file_hash = COALESCE(?, file_hash),
+                        hash_algorithm = COALESCE(?, hash_algorithm), audio_hash = COALESCE(?, audio_hash)
+                    WHERE file_path = ?
+                """, mtime_updates)
+            if replacements:
+                # A status change is an in-place update of one row, not a move between tables
+                conn.executemany("""
+                    INSERT OR REPLACE INTO integrity_results (file_path, status, file_hash, hash_algorithm, mtime,
+                                                              last_checked, codec, codec_type, error_message,
+                                                              file_size, mtime_ns, inode, partial_hash, error_class,
+                                                              audio_hash, partial_hash_algorithm)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, replacements)
+    except sqlite3.Error as e:
+        print(f"\nError writing {len(results)} results to database: {e}")
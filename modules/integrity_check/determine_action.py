@@ -1,46 +1,58 @@
 from pathlib import Path
+from typing import Iterable
 import sqlite3
-import os
-from .lock_utils import acquire_lock, release_lock, LOCK_FILE
-from .file_hash import calculate_file_hash
+from ..change_detection import file_signature, signature_matches
 
-def determine_action(db_path: Path, file_path: str, force_recheck: bool = False) -> tuple:
-    """Determine the action for a file with process-safe database access."""
-    if force_recheck:
-        try:
-            current_mtime = os.path.getmtime(file_path)
-            current_hash = calculate_file_hash(file_path)
-            return 'RUN_FFMPEG', None, current_hash, current_mtime
-        except FileNotFoundError:
-            return 'FILE_NOT_FOUND', None, None, None
+# Paths per query when loading the cache for a subset of files
+CACHE_LOOKUP_CHUNK = 500
 
+def load_cached_state(db_path: Path, file_paths: Iterable[str] = None) -> dict:
+    """Load the integrity cache as {file_path: row}: the whole cache in one query, or only file_paths.
+    Each row is (status, file_hash, mtime, file_size, mtime_ns, inode, partial_hash, hash_algorithm, audio_hash,
+    partial_hash_algorithm).
+    """
+    query = """
+        SELECT file_path, status, file_hash, mtime, file_size, mtime_ns, inode, partial_hash, hash_algorithm,
+               audio_hash, partial_hash_algorithm
+        FROM integrity_results{where}
+    """
+    conn = sqlite3.connect(db_path, timeout=60)
     try:
-        current_mtime = os.path.getmtime(file_path)
+        if file_paths is None:
+            return {row[0]: row[1:] for row in conn.execute(query.format(where=""))}
+        cached_state = {}
+        file_paths = list(file_paths)
+        for start in range(0, len(file_paths), CACHE_LOOKUP_CHUNK):
+            chunk = file_paths[start:start + CACHE_LOOKUP_CHUNK]
+            where = f" WHERE file_path IN ({', '.join('?' * len(chunk))})"
+            for row in conn.execute(query.format(where=where), chunk):
+                cached_state[row[0]] = row[1:]
+        return cached_state
+    finally:
+        conn.close()
+
+def determine_action(file_path: str, cached: tuple = None, force_recheck: bool = False, stat_result=None) -> tuple:
+    """Decide what a file needs from its cached row using only a stat call.
+    Returns (action, stored_status, cached, signature) where action is one of
+    USE_CACHED, UPDATE_MTIME, CHECK_HASH, RUN_FFMPEG or FILE_NOT_FOUND.
+    """
+    try:
+        signature = file_signature(file_path, stat_result)
     except FileNotFoundError:
         return 'FILE_NOT_FOUND', None, None, None
 
-    lock_fd = acquire_lock(LOCK_FILE)
-    try:
-        conn = sqlite3.connect(db_path, timeout=5)
-        cursor = conn.cursor()
-        for table in ['passed_files', 'failed_files']:
-            cursor.execute(f"SELECT status, file_hash, mtime FROM {table} WHERE file_path = ?", (file_path,))
-            result = cursor.fetchone()
-            if result:
-                stored_status, stored_hash, stored_mtime = result
-                if stored_mtime == current_mtime:
-                    conn.close()
-                    return 'USE_CACHED', stored_status, None, current_mtime
-                else:
-                    current_hash = calculate_file_hash(file_path)
-                    if stored_hash == current_hash:
-                        conn.close()
-                        return 'UPDATE_MTIME', stored_status, current_hash, current_mtime
-                    else:
-                        conn.close()
-                        return 'RUN_FFMPEG', None, current_hash, current_mtime
-        conn.close()
-        current_hash = calculate_file_hash(file_path)
-        return 'RUN_FFMPEG', None, current_hash, current_mtime
-    finally:
-        release_lock(lock_fd)
\ No newline at end of file
+    if force_recheck or cached is None:
+        return 'RUN_FFMPEG', None, cached, signature
+
+    stored_status, _, stored_mtime, file_size, mtime_ns, inode, _, _, audio_hash, _ = cached
+    if signature_matches((file_size, mtime_ns, inode), signature):
+        return 'USE_CACHED', stored_status, cached, signature
+    if mtime_ns is None and stored_mtime == signature['mtime']:
+        # Row from before stat signatures were stored: unchanged, just record the signature
+        return 'UPDATE_MTIME', stored_status, cached, signature
+    if file_size is not None and file_size != signature['file_size']:
+        if audio_hash and stored_status == 'PASSED':
+            # A retag changes the size but not the audio; hash_step compares the audio hash
+            return 'CHECK_HASH', stored_status, cached, signature
+        return 'RUN_FFMPEG', None, cached, signature
+    return 'CHECK_HASH', stored_status, cached, signature
@@ -1,9 +1,8 @@
-import hashlib
+from ..hashing import hash_file
 
-def calculate_file_hash(file_path: str) -> str:
-    """Calculate the MD5 hash of a file."""
-    hasher = hashlib.md5()
-    with open(file_path, 'rb') as f:
-        while chunk := f.read(8192):
-            hasher.update(chunk)
-    return hasher.hexdigest()
\ No newline at end of file
+# Algorithm of hashes stored before rows carried a hash_algorithm tag
+LEGACY_HASH_ALGORITHM = 'md5'
+
+def calculate_file_hash(file_path: str, algorithm: str = None) -> str:
+    """Calculate the hash of a file with the given or configured default algorithm."""
+    return hash_file(file_path, algorithm)
@@ -0,0 +1,137 @@
+import os
+import queue
+import threading
+import contextlib
+from typing import Iterable, Iterator
+from .determine_action import determine_action
+from .process_file import hash_step, decode_step, error_result
+from ..bounded_executor import process_pool
+
+# Items allowed to wait between two stages; keeps memory flat on multi-million-file trees
+PIPELINE_QUEUE_SIZE = 256
+
+_DONE = object()
+
+def cached_result(action: str, stored_status: str, file_path: str, signature: dict):
+    """Build the result for a file determine_action settled from the cache, or None if it needs work."""
+    if action == 'USE_CACHED':
+        return ('USE_CACHED', stored_status, "Cached result", file_path, None)
+    if action == 'UPDATE_MTIME':
+        return ('UPDATE_MTIME', stored_status, "Cached result", file_path,
+                dict(signature, partial_hash=None, partial_hash_algorithm=None, file_hash=None, hash_algorithm=None))
+    return None
+
+def run_pipeline(targets: Iterable[tuple], cached_state: dict, force_recheck: bool = False,
+                 hash_workers: int = 4, decode_workers: int = 4,
+                 queue_size: int = PIPELINE_QUEUE_SIZE, quick: bool = False) -> Iterator[tuple]:
+    """Check files through overlapping stages joined by bounded queues:
+    walk + stat/cache filter -> hash (threads) -> FFmpeg decode (one subprocess per thread).
+    Yields process_file-style results as they complete so the caller can feed the DB writer.
+    With quick, the decode stage tries the checksum tier before FFmpeg (see decode_step) in a process
+    pool with up to one process per core, since in the decode threads it would hold the GIL and use one core.
+    If the caller stops early (an error, or a cancelled daemon job), the stages stop too.
+    """
+    hash_queue = queue.Queue(maxsize=queue_size)
+    decode_queue = queue.Queue(maxsize=queue_size)
+    result_queue = queue.Queue(maxsize=queue_size)
+    remaining = {'hash': hash_workers, 'decode': decode_workers}
+    remaining_lock = threading.Lock()
+    errors = []
+    stop = threading.Event()
+
+    def put(q: queue.Queue, item):
+        """Put an item on a bounded queue, giving up once the pipeline is stopped."""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def get(q: queue.Queue):
+        """Take an item from a queue; _DONE once the pipeline is stopped."""
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def stage_finished(stage: str) -> bool:
+        """Count down a stage's workers; True for the last one to finish."""
+        with remaining_lock:
+            remaining[stage] -= 1
+            return remaining[stage] == 0
+
+    def filter_stage():
+        try:
+            for file_path, stat_result in targets:
+                if stop.is_set():
+                    break
+                action, stored_status, cached, signature = determine_action(
+                    file_path, cached_state.get(file_path), force_recheck, stat_result)
+                result = cached_result(action, stored_status, file_path, signature)
+                if result is not None:
+                    put(result_queue, result)
+                elif action != 'FILE_NOT_FOUND':
+                    put(hash_queue, (file_path, action, stored_status, cached, signature))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            for _ in range(hash_workers):
+                put(hash_queue, _DONE)
+            put(result_queue, _DONE)
+
+    def hash_stage():
+        try:
+            while (task := get(hash_queue)) is not _DONE:
+                file_path, signature = task[0], task[4]
+                try:
+                    outcome, value = hash_step(*task)
+                except Exception as e:
+                    outcome, value = 'DONE', error_result(file_path, e)
+                if outcome == 'DONE':
+                    put(result_queue, value)
+                else:
+                    put(decode_queue, (file_path, signature, value))
+        finally:
+            if stage_finished('hash'):
+                for _ in range(decode_workers):
+                    put(decode_queue, _DONE)
+
+    def decode_stage(quick_pool):
+        try:
+            while (task := get(decode_queue)) is not _DONE:
+                try:
+                    put(result_queue, decode_step(*task, quick, quick_pool))
+                except Exception as e:
+                    put(result_queue, error_result(task[0], e))
+        finally:
+            if stage_finished('decode'):
+                put(result_queue, _DONE)
+
+    quick_workers = min(decode_workers, os.cpu_count() or 1)
+    with (process_pool(quick_workers) if quick else contextlib.nullcontext()) as quick_pool:
+        threads = [threading.Thread(target=filter_stage, name="integrity-walk", daemon=True)]
+        threads += [threading.Thread(target=hash_stage, name=f"integrity-hash-{i}", daemon=True)
+                    for i in range(hash_workers)]
+        threads += [threading.Thread(target=decode_stage, args=(quick_pool,), name=f"integrity-decode-{i}",
+                                     daemon=True) for i in range(decode_workers)]
+        for thread in threads:
+            thread.start()
+
+        # Two producers end the result stream: the filter stage and the last decode worker
+        finished = 0
+        try:
+            while finished < 2:
+                item = result_queue.get()
+                if item is _DONE:
+                    finished += 1
+                else:
+                    yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+    if errors:
+        raise errors[0]
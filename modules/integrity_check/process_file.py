@@ -1,17 +1,81 @@
-from pathlib import Path
-from .determine_action import determine_action
-from .check_file import check_single_file
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from ..change_detection import compute_hashes, content_matches, get_change_detection_level
+from .file_hash import LEGACY_HASH_ALGORITHM
+from .check_file import verify_file
+from .quick_verify import quick_verify
+from .audio_hash import audio_hash, audio_hash_matches
+from .structure_check import ERROR_DECODE, check_structure
 
-def process_file(db_path: Path, file_path: str, force_recheck: bool = False) -> tuple:
-    """Process a file with coordinated database access."""
-    action, stored_status, current_hash, current_mtime = determine_action(db_path, file_path, force_recheck)
-    if action == 'USE_CACHED':
-        return ('USE_CACHED', stored_status, "Cached result", file_path, None)
-    elif action == 'UPDATE_MTIME':
-        return ('UPDATE_MTIME', stored_status, "Cached result (hash matches)", file_path, current_mtime)
-    elif action == 'RUN_FFMPEG':
-        status, message, _, codec = check_single_file(file_path)
-        update_info = (file_path, current_hash, current_mtime, status, codec)
-        return ('RUN_FFMPEG', status, message, file_path, update_info)
-    else:
-        return ('ERROR', "Unknown action", file_path, None)
\ No newline at end of file
+def hash_step(file_path: str, action: str, stored_status: str = None,
+              cached: tuple = None, signature: dict = None) -> tuple:
+    """Hashing half of process_file.
+    Returns ('DONE', result) when hashing settles the file, or ('DECODE', hashes) when it must be decoded.
+    A passed file whose bytes changed but whose audio hash did not was only retagged and is not decoded again.
+    """
+    track_audio = get_change_detection_level() != 'stat'
+    try:
+        if action == 'CHECK_HASH':
+            (_, stored_hash, _, stored_size, _, _, stored_partial, stored_algorithm, stored_audio,
+             stored_partial_algorithm) = cached
+            if stored_size is None or stored_size == signature['file_size']:
+                matches, hashes = content_matches(file_path, stored_partial, stored_hash,
+                                                  stored_algorithm or LEGACY_HASH_ALGORITHM, stored_partial_algorithm)
+                if matches:
+                    update_info = dict(signature, partial_hash=hashes.get('partial_hash'),
+                                       partial_hash_algorithm=hashes.get('partial_hash_algorithm'),
+                                       file_hash=hashes.get('file_hash'), hash_algorithm=hashes.get('hash_algorithm'))
+                    return 'DONE', ('UPDATE_MTIME', stored_status, "Cached result (hash matches)", file_path, update_info)
+            if track_audio and stored_audio and stored_status == "PASSED" and audio_hash_matches(file_path, stored_audio):
+                update_info = dict(signature, **compute_hashes(file_path), audio_hash=stored_audio)
+                return 'DONE', ('UPDATE_MTIME', stored_status, "Cached result (audio unchanged)", file_path, update_info)
+        elif action != 'RUN_FFMPEG':
+            return 'DONE', ('ERROR', None, "Unknown action", file_path, None)
+        hashes = compute_hashes(file_path)
+        hashes['audio_hash'] = audio_hash(file_path) if track_audio else None
+        return 'DECODE', hashes
+    except FileNotFoundError:
+        return 'DONE', ('ERROR', None, "File not found", file_path, None)
+
+def decode_step(file_path: str, signature: dict, hashes: dict, quick: bool = False,
+                quick_pool: concurrent.futures.Executor = None) -> tuple:
+    """Decoding half of process_file: run FFmpeg and build the result to store.
+    MP4, WAV and MP3 files with a damaged or truncated container fail on the structure check alone.
+    With quick, FLAC and Ogg files whose built-in checksums all pass skip the FFmpeg decode.
+    The checksum pass is pure Python that holds the GIL, so concurrent callers should hand it a
+    process pool as quick_pool.
+    """
+    problem = check_structure(file_path)
+    if problem is not None:
+        update_info = dict(signature, **hashes, file_path=file_path, status="FAILED", codec="unknown",
+                           codec_type="unknown", error_class=problem.error_class)
+        return ('RUN_FFMPEG', "FAILED", f"Structure check: {problem}", file_path, update_info)
+    result = None
+    if quick and quick_pool is None:
+        result = quick_verify(file_path)
+    elif quick:
+        try:
+            result = quick_pool.submit(quick_verify, file_path).result()
+        except BrokenProcessPool:
+            pass  # A crashed worker only costs the shortcut; FFmpeg still decodes the file
+    result = result or verify_file(file_path)
+    update_info = dict(signature, **hashes, file_path=file_path, status=result['status'],
+                       codec=result['codec'], codec_type=result['codec_type'],
+                       error_class=ERROR_DECODE if result['status'] == "FAILED" else None)
+    return ('RUN_FFMPEG', result['status'], result['message'], file_path, update_info)
+
+def error_result(file_path: str, error: Exception) -> tuple:
+    """Build the ERROR result for a file whose hashing or decoding raised, so one unreadable file
+    is reported instead of stopping the run."""
+    return ('ERROR', None, f"{type(error).__name__}: {error}", file_path, None)
+
+def process_file(file_path: str, action: str, stored_status: str = None,
+                 cached: tuple = None, signature: dict = None, quick: bool = False) -> tuple:
+    """Do the hashing and decoding that determine_action decided a file needs."""
+    try:
+        outcome, value = hash_step(file_path, action, stored_status, cached, signature)
+        if outcome == 'DONE':
+            return value
+        return decode_step(file_path, signature, value, quick)
+    except Exception as e:
+        return error_result(file_path, e)
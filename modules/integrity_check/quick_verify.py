@@ -0,0 +1,219 @@
+import os
+import mmap
+import zlib
+from typing import Optional, Tuple
+from .check_file import normalize_codec
+
+# CRC-8 of FLAC frame headers: polynomial x^8 + x^2 + x + 1, MSB first, initial value 0
+_CRC8_TABLE = []
+for _byte in range(256):
+    _crc = _byte
+    for _ in range(8):
+        _crc = ((_crc << 1) ^ 0x07) & 0xFF if _crc & 0x80 else (_crc << 1) & 0xFF
+    _CRC8_TABLE.append(_crc)
+
+# Ogg's CRC-32 is the zlib polynomial processed MSB first; zlib.crc32 works LSB first, so bytes are
+# bit-reversed on the way in (bytes.translate) and the register on the way out
+_BIT_REVERSE = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+FLAC_BLOCK_SIZES = {1: 192, **{code: 576 << (code - 2) for code in range(2, 6)},
+                    **{code: 256 << (code - 8) for code in range(8, 16)}}
+FLAC_MAX_FRAME_SEARCH = 16 * 1024 * 1024  # bytes scanned for the end of one frame before giving up
+FLAC_MAX_FALSE_SYNCS = 4  # valid-looking headers tried as the end of one frame before giving up
+
+def crc8(data: bytes) -> int:
+    """CRC-8 as used by FLAC frame headers."""
+    crc = 0
+    for byte in data:
+        crc = _CRC8_TABLE[crc ^ byte]
+    return crc
+
+def ogg_crc32(page: bytes) -> int:
+    """CRC-32 of an Ogg page (with its checksum field zeroed), computed by zlib."""
+    register = zlib.crc32(page.translate(_BIT_REVERSE), 0xFFFFFFFF) ^ 0xFFFFFFFF
+    return int(f"{register:032b}"[::-1], 2)
+
+def _mod_x15_x_1(value: int) -> int:
+    """Reduce a GF(2) polynomial (as an int) modulo x^15 + x + 1 with big-int shifts and XORs.
+    Uses x^(15*2^k) = (x + 1)^(2^k) = x^(2^k) + 1, so each step folds away thousands of bits at C speed.
+    """
+    while True:
+        length = value.bit_length()
+        if length <= 15:
+            return value
+        step = ((length - 1) // 15).bit_length() - 1
+        shift = 15 << step
+        high = value >> shift
+        value = (value & ((1 << shift) - 1)) ^ (high << (1 << step)) ^ high
+
+def flac_frame_crc_ok(frame: bytes) -> bool:
+    """Check a whole FLAC frame, trailing CRC-16 included, against its checksum.
+    The FLAC CRC-16 polynomial 0x8005 is (x + 1)(x^15 + x + 1): a frame with its CRC appended is a
+    multiple of both factors, i.e. it has even parity and no remainder modulo x^15 + x + 1.
+    """
+    value = int.from_bytes(frame, 'big')
+    return value.bit_count() % 2 == 0 and _mod_x15_x_1(value) == 0
+
+def parse_flac_frame_header(data, offset: int, blocking_strategy: int = None) -> Optional[int]:
+    """Validate the frame header at offset (fields and CRC-8); return its block size or None."""
+    header = data[offset:offset + 16]
+    if len(header) < 6 or header[0] != 0xFF or header[1] & 0xFE != 0xF8:
+        return None
+    if blocking_strategy is not None and header[1] & 0x01 != blocking_strategy:
+        return None
+    block_code, rate_code = header[2] >> 4, header[2] & 0x0F
+    channels, sample_size = header[3] >> 4, (header[3] >> 1) & 0x07
+    if block_code == 0 or rate_code == 15 or channels > 10 or sample_size == 3 or header[3] & 0x01:
+        return None
+    # Frame or sample number, UTF-8 style: the leading ones of the first byte give the length
+    leading = 8 - (header[4] ^ 0xFF).bit_length()
+    if leading == 1 or leading > 7:
+        return None
+    position = 5 + max(0, leading - 1)
+    block_size = FLAC_BLOCK_SIZES.get(block_code)
+    if block_code == 6:
+        block_size = header[position] + 1
+        position += 1
+    elif block_code == 7:
+        block_size = int.from_bytes(header[position:position + 2], 'big') + 1
+        position += 2
+    position += {12: 1, 13: 2, 14: 2}.get(rate_code, 0)
+    if position >= len(header) or crc8(header[:position]) != header[position]:
+        return None
+    return block_size
+
+def flac_audio_start(data) -> Tuple[int, int]:
+    """Skip an ID3v2 prefix and the metadata blocks; return (first frame offset, total samples)."""
+    offset = 0
+    if data[:3] == b'ID3' and len(data) >= 10:
+        size = 0
+        for byte in data[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        offset = 10 + size
+    if data[offset:offset + 4] != b'fLaC':
+        raise ValueError("no fLaC marker")
+    offset += 4
+    total_samples = 0
+    while True:
+        header = data[offset:offset + 4]
+        if len(header) < 4:
+            raise ValueError("truncated metadata")
+        block_type, length = header[0] & 0x7F, int.from_bytes(header[1:4], 'big')
+        if block_type == 0:
+            streaminfo = data[offset + 4:offset + 4 + length]
+            total_samples = int.from_bytes(streaminfo[13:18], 'big') & 0xFFFFFFFFF
+        offset += 4 + length
+        if header[0] & 0x80:
+            return offset, total_samples
+
+def verify_flac(data) -> Tuple[bool, str]:
+    """Check every FLAC frame's header CRC-8 and frame CRC-16 and the sample count in STREAMINFO.
+    Returns (True, message) when all checks pass, else (False, reason) to escalate to a full decode.
+    """
+    try:
+        offset, total_samples = flac_audio_start(data)
+    except ValueError as e:
+        return False, f"FLAC metadata: {e}"
+    block_size = parse_flac_frame_header(data, offset)
+    if block_size is None:
+        return False, "no valid frame after the metadata"
+    strategy = data[offset + 1] & 0x01
+    sync = bytes(data[offset:offset + 2])
+    end_of_data = len(data)
+    frames = samples = 0
+    while True:
+        # A frame ends where the next valid header starts; headers faked by the audio data are
+        # recognized because the frame they would end fails its CRC-16, and the search goes on
+        candidate = data.find(sync, offset + 2)
+        tries = 0
+        while True:
+            if candidate == -1:
+                if not flac_frame_crc_ok(data[offset:end_of_data]):
+                    return False, f"frame {frames} fails its CRC-16 or the file is truncated"
+                frames += 1
+                samples += block_size
+                if total_samples and samples != total_samples:
+                    return False, f"{samples} samples in frames, STREAMINFO says {total_samples}"
+                return True, f"{frames} FLAC frames pass CRC-8 and CRC-16"
+            if candidate - offset > FLAC_MAX_FRAME_SEARCH:
+                return False, f"frame {frames} has no valid end"
+            next_block_size = parse_flac_frame_header(data, candidate, strategy)
+            if next_block_size is not None:
+                if flac_frame_crc_ok(data[offset:candidate]):
+                    break
+                tries += 1
+                if tries >= FLAC_MAX_FALSE_SYNCS:
+                    return False, f"frame {frames} fails its CRC-16"
+            candidate = data.find(sync, candidate + 1)
+        frames += 1
+        samples += block_size
+        offset, block_size = candidate, next_block_size
+
+def verify_ogg(data) -> Tuple[bool, str]:
+    """Check every Ogg page's CRC-32, page sequence numbers and the end-of-stream flag."""
+    offset = pages = 0
+    next_sequence = {}
+    open_streams = set()
+    end_of_data = len(data)
+    while offset < end_of_data:
+        header = data[offset:offset + 27]
+        if len(header) < 27 or header[:4] != b'OggS' or header[4] != 0:
+            return False, f"no Ogg page at byte {offset}"
+        segments = header[26]
+        table = data[offset + 27:offset + 27 + segments]
+        length = 27 + segments + sum(table)
+        if len(table) < segments or offset + length > end_of_data:
+            return False, f"page {pages} is truncated"
+        page = bytes(data[offset:offset + length])
+        stored = int.from_bytes(page[22:26], 'little')
+        if ogg_crc32(page[:22] + b'\0\0\0\0' + page[26:]) != stored:
+            return False, f"page {pages} fails its CRC-32"
+        serial = int.from_bytes(page[14:18], 'little')
+        sequence = int.from_bytes(page[18:22], 'little')
+        if header[5] & 0x02:
+            open_streams.add(serial)
+        elif next_sequence.get(serial, sequence) != sequence:
+            return False, f"page {pages} is out of sequence (a page is missing)"
+        next_sequence[serial] = sequence + 1
+        if header[5] & 0x04:
+            open_streams.discard(serial)
+        offset += length
+        pages += 1
+    if open_streams:
+        return False, "a logical stream has no end-of-stream page (truncated)"
+    return True, f"{pages} Ogg pages pass CRC-32"
+
+def ogg_codec(data) -> str:
+    """Identify the codec of an Ogg file from its first packet."""
+    first_packet = bytes(data[27 + data[26]:27 + data[26] + 8]) if len(data) > 27 else b''
+    for signature, codec in ((b'OpusHead', 'opus'), (b'vorbis', 'vorbis'), (b'FLAC', 'flac'), (b'Speex', 'speex')):
+        if signature in first_packet:
+            return codec
+    return 'unknown'
+
+# Extension -> (verifier, codec); codec None means it is read from the file
+QUICK_VERIFIERS = {
+    '.flac': (verify_flac, 'flac'),
+    '.ogg': (verify_ogg, None),
+    '.oga': (verify_ogg, None),
+    '.opus': (verify_ogg, 'opus'),
+}
+
+def quick_verify(file_path: str) -> Optional[dict]:
+    """Verify a FLAC or Ogg file from its built-in checksums without decoding it.
+    Returns a verify_file-style result when every checksum passes, or None when the file is not
+    covered, fails or is ambiguous and needs the full FFmpeg decode.
+    """
+    verifier, codec = QUICK_VERIFIERS.get(os.path.splitext(file_path)[1].lower(), (None, None))
+    if verifier is None:
+        return None
+    try:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            passed, _ = verifier(data)
+            if not passed:
+                return None
+            codec = codec or ogg_codec(data)
+    except (OSError, ValueError):
+        return None  # Empty, unreadable or unmappable files are left to FFmpeg
+    codec, codec_type = normalize_codec(codec)
+    return {'status': "PASSED", 'message': "", 'file_path': file_path, 'codec': codec, 'codec_type': codec_type}
@@ -0,0 +1,237 @@
+import os
+import mmap
+from typing import Optional, Tuple
+
+# Error classes recorded in integrity_results.error_class
+ERROR_TRUNCATED = 'truncated'
+ERROR_STRUCTURE = 'structure'
+ERROR_DECODE = 'decode'
+
+MP4_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+MP3_TAIL_SCAN_BYTES = 64 * 1024  # end of an MP3 searched for a chain of frames running to EOF
+MP3_MIN_CHAIN = 3  # consecutive frames needed to trust a sync word found in the tail
+
+# MPEG audio bitrates in kbit/s by (version is MPEG-1, layer) and bitrate index
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+class StructureError(Exception):
+    """A container whose structure is damaged; error_class says how."""
+
+    def __init__(self, error_class: str, message: str):
+        super().__init__(message)
+        self.error_class = error_class
+
+def mp4_atoms(data, start: int, end: int):
+    """Yield (type, offset, header_size, size) for the atoms between start and end."""
+    offset = start
+    while offset + 8 <= end:
+        size = int.from_bytes(data[offset:offset + 4], 'big')
+        kind = bytes(data[offset + 4:offset + 8])
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise StructureError(ERROR_TRUNCATED, f"'{kind.decode('latin-1')}' atom header is cut off")
+            size = int.from_bytes(data[offset + 8:offset + 16], 'big')
+            header = 16
+        elif size == 0:
+            size = end - offset  # Extends to the end of its parent
+        if size < header:
+            raise StructureError(ERROR_STRUCTURE, f"'{kind.decode('latin-1')}' atom has an invalid size {size}")
+        yield kind, offset, header, size
+        offset += size
+
+def check_mp4(data) -> None:
+    """Walk the MP4 atom tree: every atom must fit in the file and every stco/co64 chunk offset
+    must point inside it."""
+    file_size = len(data)
+    top_level = set()
+    for kind, offset, header, size in mp4_atoms(data, 0, file_size):
+        top_level.add(kind)
+        if offset + size > file_size:
+            raise StructureError(ERROR_TRUNCATED, f"'{kind.decode('latin-1')}' atom needs {offset + size} bytes, "
+                                                  f"file has {file_size}")
+    if b'ftyp' not in top_level:
+        raise StructureError(ERROR_STRUCTURE, "no 'ftyp' atom")
+    if b'moov' not in top_level:
+        # A download cut off before the trailing moov atom has no index to play from
+        raise StructureError(ERROR_TRUNCATED, "no 'moov' atom")
+    if b'mdat' not in top_level and b'moof' not in top_level:
+        raise StructureError(ERROR_TRUNCATED, "no 'mdat' atom")
+
+    stack = [(0, file_size)]
+    while stack:
+        start, end = stack.pop()
+        for kind, offset, header, size in mp4_atoms(data, start, end):
+            if offset + size > end:
+                raise StructureError(ERROR_STRUCTURE, f"'{kind.decode('latin-1')}' atom overruns its parent")
+            if kind in MP4_CONTAINERS:
+                stack.append((offset + header, offset + size))
+            elif kind in (b'stco', b'co64'):
+                entry_size = 4 if kind == b'stco' else 8
+                count = int.from_bytes(data[offset + header + 4:offset + header + 8], 'big')
+                table = offset + header + 8
+                if table + count * entry_size > offset + size:
+                    raise StructureError(ERROR_STRUCTURE, f"'{kind.decode('latin-1')}' table overruns its atom")
+                if count:
+                    # Chunks are stored in order, so the last offset is the largest in practice
+                    last = table + (count - 1) * entry_size
+                    chunk_offset = int.from_bytes(data[last:last + entry_size], 'big')
+                    if chunk_offset >= file_size:
+                        raise StructureError(ERROR_TRUNCATED, f"audio chunk at byte {chunk_offset} is past the "
+                                                              f"end of the file ({file_size} bytes)")
+
+def check_riff(data) -> None:
+    """Check RIFF/WAVE chunk sizes against the file size."""
+    file_size = len(data)
+    if data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        raise StructureError(ERROR_STRUCTURE, "no RIFF/WAVE header")
+    riff_size = int.from_bytes(data[4:8], 'little')
+    if riff_size in (0, 0xFFFFFFFF):
+        return  # Written by a streaming encoder that never filled in the sizes
+    if riff_size + 8 > file_size:
+        raise StructureError(ERROR_TRUNCATED, f"RIFF header declares {riff_size + 8} bytes, file has {file_size}")
+    offset = 12
+    found_data = False
+    while offset + 8 <= riff_size + 8:
+        chunk_id = bytes(data[offset:offset + 4])
+        chunk_size = int.from_bytes(data[offset + 4:offset + 8], 'little')
+        if offset + 8 + chunk_size > file_size:
+            raise StructureError(ERROR_TRUNCATED, f"'{chunk_id.decode('latin-1')}' chunk needs "
+                                                  f"{offset + 8 + chunk_size} bytes, file has {file_size}")
+        if offset + 8 + chunk_size > riff_size + 8:
+            raise StructureError(ERROR_STRUCTURE, f"'{chunk_id.decode('latin-1')}' chunk overruns the RIFF chunk")
+        found_data = found_data or chunk_id == b'data'
+        offset += 8 + chunk_size + (chunk_size & 1)  # Chunks are padded to an even size
+    if not found_data:
+        raise StructureError(ERROR_TRUNCATED, "no 'data' chunk")
+
+def _mp3_frame(header) -> Optional[Tuple[int, tuple]]:
+    """Parse a 4-byte MPEG audio frame header; return (frame length, stream parameters) or None."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index, rate_index = header[2] >> 4, (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and not mpeg1:
+        length = 72 * bitrate // sample_rate + padding
+    else:
+        length = 144 * bitrate // sample_rate + padding
+    return length, (version, layer, sample_rate)
+
+def trailing_tags_start(data, start: int = 0) -> int:
+    """Get the offset where ID3v1 and APEv2 tags appended after the audio begin (the file size if none)."""
+    end = len(data)
+    if end - start >= 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128
+    if end - start >= 32 and data[end - 32:end - 24] == b'APETAGEX':
+        tag_size = int.from_bytes(data[end - 20:end - 16], 'little')
+        flags = int.from_bytes(data[end - 12:end - 8], 'little')
+        end -= tag_size + (32 if flags & 0x80000000 else 0)
+    return max(start, end)
+
+def mp3_audio_bounds(data) -> Tuple[int, int]:
+    """Get the start and end of the MPEG frames, skipping ID3v2, ID3v1 and APEv2 tags."""
+    start = 0
+    if data[:3] == b'ID3' and len(data) >= 10:
+        size = 0
+        for byte in data[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        start = min(len(data), 10 + size + (10 if data[5] & 0x10 else 0))  # Optional ID3v2.4 footer
+    return start, trailing_tags_start(data, start)
+
+def check_mp3(data) -> None:
+    """Check that the MPEG frame chain at the end of the file runs exactly to its end, and that the
+    stream length in a Xing/Info or VBRI header fits in the file."""
+    start, end = mp3_audio_bounds(data)
+    first = data.find(b'\xff', start, min(end, start + 64 * 1024))
+    while first != -1 and _mp3_frame(data[first:first + 4]) is None:
+        first = data.find(b'\xff', first + 1, min(end, start + 64 * 1024))
+    if first == -1:
+        raise StructureError(ERROR_STRUCTURE, "no MPEG audio frame near the start")
+
+    # Xing/Info and VBRI headers record the stream length in bytes and frames
+    first_length, _ = _mp3_frame(data[first:first + 4])
+    first_frame = bytes(data[first:first + max(first_length, 64)])
+    stream_bytes = frames = None
+    # The Xing/Info tag follows the side information, whose size depends on version and channel mode
+    xing = next((offset for offset in (13, 21, 36) if first_frame[offset:offset + 4] in (b'Xing', b'Info')), -1)
+    if xing != -1:
+        flags = int.from_bytes(first_frame[xing + 4:xing + 8], 'big')
+        position = xing + 8
+        if flags & 0x01:
+            frames = int.from_bytes(first_frame[position:position + 4], 'big')
+            position += 4
+        if flags & 0x02:
+            stream_bytes = int.from_bytes(first_frame[position:position + 4], 'big')
+    elif first_frame[36:40] == b'VBRI':
+        stream_bytes = int.from_bytes(first_frame[46:50], 'big')
+        frames = int.from_bytes(first_frame[50:54], 'big')
+    if stream_bytes and first + stream_bytes > len(data):
+        raise StructureError(ERROR_TRUNCATED, f"{'VBRI' if xing == -1 else 'Xing'} header expects "
+                                              f"{stream_bytes} bytes of audio, only {len(data) - first} remain")
+    if frames and not stream_bytes and first + frames * (first_length - 1) > len(data):
+        # Constant bitrate Info header without a byte count: every frame is at least length - 1 bytes
+        raise StructureError(ERROR_TRUNCATED, f"header expects {frames} frames, the file is too short")
+
+    # Lock onto a frame chain in the tail and follow it to the end of the audio
+    position = data.find(b'\xff', max(first, end - MP3_TAIL_SCAN_BYTES), end)
+    while position != -1:
+        frame = _mp3_frame(data[position:position + 4])
+        chain, offset = 0, position
+        while frame is not None and offset < end:
+            chain += 1
+            offset += frame[0]
+            next_frame = _mp3_frame(data[offset:offset + 4]) if offset + 4 <= end else None
+            if next_frame is not None and next_frame[1] != frame[1]:
+                next_frame = None
+            frame = next_frame
+        if chain >= MP3_MIN_CHAIN:
+            if offset > end:
+                raise StructureError(ERROR_TRUNCATED, f"last MPEG frame is cut off ({offset - end} bytes missing)")
+            return  # The chain ends at the end of the audio, or at trailing data FFmpeg will judge
+        position = data.find(b'\xff', position + 1, end)
+
+# Extension -> validator for the formats whose structure is checked before decoding
+STRUCTURE_CHECKS = {
+    '.m4a': check_mp4,
+    '.mp4': check_mp4,
+    '.m4b': check_mp4,
+    '.wav': check_riff,
+    '.mp3': check_mp3,
+}
+
+def check_structure(file_path: str) -> Optional[StructureError]:
+    """Validate the container structure of an MP4, WAV or MP3 file without decoding it.
+    Returns the StructureError for a damaged or truncated file, or None when it looks whole or is
+    not a format with a structure check.
+    """
+    validator = STRUCTURE_CHECKS.get(os.path.splitext(file_path)[1].lower())
+    if validator is None:
+        return None
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return StructureError(ERROR_TRUNCATED, "file is empty")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                validator(data)
+    except StructureError as e:
+        return e
+    except (OSError, ValueError):
+        pass  # Unreadable files are left to FFmpeg to report
+    return None
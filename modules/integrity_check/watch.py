@@ -0,0 +1,260 @@
+from pathlib import Path
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import utils  # Import from root directory
+from .db_init import initialize_database
+from .determine_action import load_cached_state
+from .db_writer import start_db_writer, stop_db_writer
+from .pipeline import run_pipeline
+
+DEFAULT_DEBOUNCE = 5.0  # seconds a file must stay quiet before it is checked
+DEFAULT_POLL_INTERVAL = 30.0  # seconds between rescans when inotify is unavailable
+
+# Constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+class InotifyWatcher:
+    """Recursive directory watcher on Linux inotify, called through ctypes.
+    read() returns (kind, path) events: 'changed', 'deleted', 'deleted_tree' or 'rescan'.
+    """
+
+    def __init__(self, root: str, scan_options: dict):
+        self.root = root
+        self.scan_options = scan_options
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.watches = {}  # watch descriptor -> directory path
+        try:
+            self.add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def add_tree(self, directory: str) -> list:
+        """Watch a directory and everything below it; returns the audio files already inside."""
+        audio_files = []
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise OSError(err, "inotify watch limit reached (raise fs.inotify.max_user_watches)")
+                continue  # Vanished or unreadable directory
+            self.watches[wd] = current
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not utils.is_skipped_directory(entry.name, **self.scan_options):
+                                stack.append(entry.path)
+                        elif utils.is_audio_file(entry.name):
+                            audio_files.append(entry.path)
+            except OSError:
+                continue
+        return audio_files
+
+    def remove_tree(self, directory: str):
+        """Stop watching a directory and everything below it. A directory moved out of the tree keeps
+        its watches, which would report events under its old path; one moved within the tree is
+        watched again under its new path when its IN_MOVED_TO arrives."""
+        prefix = directory.rstrip(os.sep) + os.sep
+        for wd, path in list(self.watches.items()):
+            if path == directory or path.startswith(prefix):
+                del self.watches[wd]
+                self.libc.inotify_rm_watch(self.fd, wd)  # Fails harmlessly if the directory is already gone
+
+    def read(self, timeout: float = None) -> list:
+        """Wait up to timeout seconds (forever if None) and return the events that arrived."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b'\0')
+                offset += _EVENT_HEADER.size + length
+                events.extend(self._translate(wd, mask, name))
+        return events
+
+    def _translate(self, wd: int, mask: int, name: bytes) -> list:
+        """Turn one raw inotify event into watcher events."""
+        if mask & IN_Q_OVERFLOW:
+            return [('rescan', self.root)]
+        if mask & IN_IGNORED:
+            self.watches.pop(wd, None)
+            return []
+        directory = self.watches.get(wd)
+        if directory is None or not name:
+            return []
+        path = os.path.join(directory, os.fsdecode(name))
+        if mask & IN_ISDIR:
+            if utils.is_skipped_directory(os.path.basename(path), **self.scan_options):
+                return []
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                # Files written before the watch was added would otherwise be missed
+                return [('changed', file_path) for file_path in self.add_tree(path)]
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                self.remove_tree(path)
+                return [('deleted_tree', path)]
+            return []
+        if not utils.is_audio_file(path):
+            return []
+        if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+            return [('changed', path)]
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            return [('deleted', path)]
+        return []
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Fallback watcher that rescans the tree and diffs (size, mtime_ns) snapshots."""
+
+    def __init__(self, root: str, scan_options: dict, interval: float = DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.scan_options = scan_options
+        self.interval = interval
+        self.snapshot = self._scan()
+        self.next_scan = time.monotonic() + interval
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        for entry in utils.iter_audio_entries(self.root, **self.scan_options):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout: float = None) -> list:
+        """Wait up to timeout seconds, rescanning when the poll interval is due."""
+        wait = max(0.0, self.next_scan - time.monotonic())
+        time.sleep(wait if timeout is None else min(wait, timeout))
+        if time.monotonic() < self.next_scan:
+            return []
+        snapshot = self._scan()
+        self.next_scan = time.monotonic() + self.interval
+        events = [('changed', path) for path, state in snapshot.items() if self.snapshot.get(path) != state]
+        events += [('deleted', path) for path in self.snapshot if path not in snapshot]
+        self.snapshot = snapshot
+        return events
+
+    def close(self):
+        pass
+
+def create_watcher(root: str, scan_options: dict, poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """Watch with inotify where available, falling back to polling."""
+    try:
+        watcher = InotifyWatcher(root, scan_options)
+        print(f"Watching '{root}' for changes with inotify ({len(watcher.watches)} directories).")
+        return watcher
+    except (OSError, AttributeError, TypeError) as e:
+        # AttributeError/TypeError: no libc or no inotify symbols (not Linux)
+        print(f"inotify unavailable ({e}); rescanning '{root}' every {poll_interval:g} seconds instead.")
+        return PollingWatcher(root, scan_options, poll_interval)
+
+def check_changed_files(file_paths: list, db_path: Path, write_queue, hash_workers: int,
+                        decode_workers: int, verbose: bool = False, quick: bool = False) -> int:
+    """Run changed files through the check pipeline; returns how many needed a fresh result."""
+    cached_state = load_cached_state(db_path, file_paths)
+    checked = 0
+    for result in run_pipeline(((path, None) for path in file_paths), cached_state, False,
+                               hash_workers, decode_workers, quick=quick):
+        action, status, message, file_path, _ = result
+        if action == 'ERROR':
+            print(f"ERROR {file_path}: {message}")
+            continue
+        if action in ('UPDATE_MTIME', 'RUN_FFMPEG'):
+            checked += 1
+            if verbose or status == 'FAILED':
+                print(f"{status} {file_path}" + (f": {message}" if message else ""))
+        if action != 'USE_CACHED':
+            write_queue.put(result)
+    return checked
+
+def watch_integrity(args):
+    """Handle 'check --watch': keep checking files as they change until interrupted."""
+    if not utils.is_ffmpeg_installed():
+        print("Error: FFmpeg is not installed or not in your PATH.")
+        return
+    if not os.path.isdir(args.path):
+        print(f"'{args.path}' is not a directory; --watch needs a directory to watch.")
+        return
+
+    root = os.path.abspath(args.path)
+    verbose = getattr(args, 'verbose', False)
+    debounce = getattr(args, 'debounce', None) or DEFAULT_DEBOUNCE
+    num_workers = args.workers if args.workers is not None else (os.cpu_count() or 4)
+    config = utils.load_config()
+    scan_options = utils.get_scan_options(config)
+    db_path = Path(config.get("cache_folder", "cache log")) / "integrity_check.db"
+    initialize_database(db_path)
+
+    watcher = create_watcher(root, scan_options, getattr(args, 'poll_interval', None) or DEFAULT_POLL_INTERVAL)
+    write_queue, writer = start_db_writer(db_path)
+    dirty = {}  # path -> time of its last event; bursts keep pushing the time back
+    try:
+        while True:
+            timeout = max(0.0, min(dirty.values()) + debounce - time.monotonic()) if dirty else None
+            for kind, path in watcher.read(timeout):
+                now = time.monotonic()
+                if kind == 'changed':
+                    dirty[path] = now
+                elif kind == 'deleted':
+                    dirty.pop(path, None)
+                    write_queue.put(('DELETE', None, None, path, None))
+                    if verbose:
+                        print(f"DELETED {path}")
+                elif kind == 'deleted_tree':
+                    prefix = path.rstrip(os.sep) + os.sep
+                    for dirty_path in [p for p in dirty if p.startswith(prefix)]:
+                        del dirty[dirty_path]
+                    write_queue.put(('DELETE_TREE', None, None, path, None))
+                    if verbose:
+                        print(f"DELETED {prefix}")
+                elif kind == 'rescan':
+                    # Events were lost; the stat filter makes re-offering every file cheap
+                    print("Watch event queue overflowed; rescanning.")
+                    dirty.update(dict.fromkeys(utils.iter_audio_files(root, **scan_options), now))
+
+            now = time.monotonic()
+            settled = [path for path, last_event in dirty.items() if now - last_event >= debounce]
+            if settled:
+                for path in settled:
+                    del dirty[path]
+                checked = check_changed_files(settled, db_path, write_queue, min(4, num_workers),
+                                              num_workers, verbose, getattr(args, 'quick', False))
+                print(f"Checked {checked} of {len(settled)} changed files.")
+    finally:
+        watcher.close()
+        stop_db_writer(write_queue, writer)
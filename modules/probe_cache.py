@@ -0,0 +1,86 @@
+import os
+import json
+import sqlite3
+import datetime
+import subprocess
+from pathlib import Path
+from functools import lru_cache
+from typing import Optional
+import utils  # Import from root directory
+from .database_utils import get_connection
+
+PROBE_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probe_cache (
+    file_path TEXT PRIMARY KEY,
+    file_size INTEGER,
+    mtime_ns INTEGER,
+    probe_json TEXT,
+    probed_at TEXT
+)
+"""
+
+# The table is created once per process, on its first pooled connection
+_schema_ready = False
+
+@lru_cache(maxsize=None)
+def get_probe_cache_path() -> Path:
+    """Get the path of the shared ffprobe cache database in the cache folder."""
+    config = utils.load_config()
+    cache_folder = Path(config.get("cache_folder", "cache log"))
+    return cache_folder / "probe_cache.db"
+
+def _get_connection() -> sqlite3.Connection:
+    """Get this thread's pooled connection to the probe cache, creating the table on first use."""
+    global _schema_ready
+    db_path = get_probe_cache_path()
+    if not _schema_ready:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = get_connection(db_path)
+    if not _schema_ready:
+        conn.execute(PROBE_CACHE_SCHEMA)
+        conn.commit()
+        _schema_ready = True
+    return conn
+
+def run_ffprobe(file_path: str) -> dict:
+    """Run ffprobe and return its full format and stream information as a dict."""
+    cmd = ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams", str(file_path)]
+    result = subprocess.check_output(cmd, universal_newlines=True)
+    return json.loads(result)
+
+def probe_file(file_path: str) -> dict:
+    """Get ffprobe data for a file, reusing the cached result while its size and mtime are unchanged.
+    Raises the same errors as ffprobe itself when the file cannot be probed.
+    """
+    file_path = str(file_path)
+    stat = os.stat(file_path)
+    key = (file_path, stat.st_size, stat.st_mtime_ns)
+
+    try:
+        row = _get_connection().execute(
+            "SELECT probe_json FROM probe_cache WHERE file_path = ? AND file_size = ? AND mtime_ns = ?", key
+        ).fetchone()
+        if row:
+            return json.loads(row[0])
+    except (sqlite3.Error, ValueError):
+        pass  # A busy or damaged cache must never stop probing
+
+    data = run_ffprobe(file_path)
+
+    try:
+        conn = _get_connection()
+        conn.execute("""
+        INSERT OR REPLACE INTO probe_cache (file_path, file_size, mtime_ns, probe_json, probed_at)
+        VALUES (?, ?, ?, ?, ?)
+        """, key + (json.dumps(data), datetime.datetime.now().isoformat()))
+        conn.commit()
+    except sqlite3.Error:
+        pass
+    return data
+
+def get_audio_stream(data: dict) -> Optional[dict]:
+    """Return the first audio stream from ffprobe data, or None if there is none."""
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == "audio":
+            return stream
+    return None
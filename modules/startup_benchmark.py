@@ -0,0 +1,74 @@
+import os
+import re
+import sys
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+AUDIO_TOOL = Path(__file__).resolve().parent.parent / "audio_tool.py"
+
+# Dependencies no command should pay for unless it actually runs
+HEAVY_MODULES = ('mutagen', 'requests', 'tqdm', 'sqlite3', 'colorama')
+COMMAND_PACKAGES = ('modules.audio_analysis', 'modules.integrity_check', 'modules.album_counter',
+                    'modules.cover_art', 'modules.SongLink', 'modules.database_check')
+
+# argv -> modules that must not be imported for it: the top-level help loads no command at all,
+# a command loads only its own package, and 'count --help' only the module that registers it
+LAZY_IMPORT_CHECKS = {
+    ('--help',): HEAVY_MODULES + COMMAND_PACKAGES + ('yaml', 'utils'),
+    ('count', '--help'): HEAVY_MODULES + tuple(p for p in COMMAND_PACKAGES if p != 'modules.album_counter')
+                         + ('modules.album_counter.counters', 'modules.album_counter.metadata'),
+    ('songlink', '--help'): tuple(p for p in COMMAND_PACKAGES if p != 'modules.SongLink'),
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+def importtime_summary(argv: List[str], cwd: str = None) -> Dict[str, object]:
+    """Run audio_tool.py under `python -X importtime` and summarize its imports.
+    Returns total_ms (top-level cumulative import time) and modules ({name: cumulative ms}).
+    The daemon lookup runs as usual, against a socket path that does not exist.
+    """
+    env = dict(os.environ, AUDIO_TOOL_SOCKET=os.path.join(tempfile.gettempdir(), "audio_tool-benchmark-none.sock"))
+    env.pop("AUDIO_TOOL_NO_DAEMON", None)
+    result = subprocess.run([sys.executable, "-X", "importtime", str(AUDIO_TOOL), *argv],
+                            capture_output=True, text=True, env=env, cwd=cwd)
+    modules = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules[name] = int(cumulative) / 1000
+        if len(indent) == 1:
+            total_us += int(cumulative)
+    return {'total_ms': total_us / 1000, 'modules': modules}
+
+def check_lazy_imports() -> List[str]:
+    """Check that each command line in LAZY_IMPORT_CHECKS avoids its forbidden imports and creates no
+    files in the working directory. Returns a list of problems; empty means startup is still lazy.
+    """
+    problems = []
+    for argv, forbidden in LAZY_IMPORT_CHECKS.items():
+        with tempfile.TemporaryDirectory() as cwd:
+            imported = importtime_summary(list(argv), cwd)['modules']
+            created = sorted(os.listdir(cwd))
+        for name in forbidden:
+            if any(module == name or module.startswith(name + ".") for module in imported):
+                problems.append(f"'audio_tool.py {' '.join(argv)}' imports {name}")
+        if created:
+            problems.append(f"'audio_tool.py {' '.join(argv)}' creates {', '.join(created)}")
+    return problems
+
+if __name__ == "__main__":
+    # Run with: python -m modules.startup_benchmark [audio_tool arguments]
+    argv = sys.argv[1:] or ['--help']
+    summary = importtime_summary(argv)
+    print(f"Import time for 'audio_tool.py {' '.join(argv)}': {summary['total_ms']:.1f} ms")
+    for name, ms in sorted(summary['modules'].items(), key=lambda item: -item[1])[:10]:
+        print(f"  {name:<50} {ms:8.1f} ms")
+    problems = check_lazy_imports()
+    for problem in problems:
+        print(f"Regression: {problem}")
+    sys.exit(1 if problems else 0)
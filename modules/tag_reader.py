@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+import mutagen
+import utils  # Import from root directory
+from .probe_cache import probe_file, run_ffprobe
+
+# Normalized tag name -> lowercase keys it is stored under across Vorbis comments, APEv2, ID3 frames,
+# MP4 atoms and ASF attributes (after the TXXX:, iTunes freeform and WM/ prefixes are stripped)
+TAG_ALIASES = {
+    'title': ('title', 'tit2', '©nam'),
+    'album': ('album', 'talb', '©alb', 'albumtitle'),
+    'artist': ('artist', 'tpe1', '©art', 'author'),
+    'album_artist': ('albumartist', 'album_artist', 'album artist', 'tpe2', 'aart'),
+    'isrc': ('isrc', 'tsrc'),
+    'upc': ('barcode', 'upc', 'ean'),
+}
+_KEY_PREFIXES = ('txxx:', '----:com.apple.itunes:', 'wm/')
+_ALIAS_LOOKUP = {alias: name for name, aliases in TAG_ALIASES.items() for alias in aliases}
+
+TAG_BACKENDS = ('mutagen', 'ffprobe')
+
+@lru_cache(maxsize=None)
+def get_tag_backend() -> str:
+    """Get the configured tag backend; 'mutagen' still falls back to ffprobe for unparseable files."""
+    backend = (utils.load_config().get("tags") or {}).get("backend")
+    return backend if backend in TAG_BACKENDS else 'mutagen'
+
+def _tag_text(value) -> Optional[str]:
+    """Turn a mutagen tag value (list, ID3 frame, MP4 freeform, ASF or APE value) into its first string."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    value = getattr(value, 'text', value)  # ID3 frames
+    if isinstance(value, list):
+        value = value[0] if value else None
+    value = getattr(value, 'value', value)  # ASF attributes
+    if value is None:
+        return None
+    if isinstance(value, bytes):  # MP4 freeform atoms
+        value = value.decode('utf-8', 'replace')
+    text = str(value).split('\0')[0].strip()  # APEv2 separates multiple values with NUL
+    return text or None
+
+def normalize_tags(tags) -> Dict[str, str]:
+    """Map a mutagen tag container onto the TAG_ALIASES names, matching keys case-insensitively."""
+    normalized = {}
+    if tags is None:
+        return normalized
+    for key, value in tags.items():
+        key = str(key).lower()
+        for prefix in _KEY_PREFIXES:
+            if key.startswith(prefix):
+                key = key[len(prefix):]
+                break
+        name = _ALIAS_LOOKUP.get(key)
+        if name and name not in normalized:
+            text = _tag_text(value)
+            if text:
+                normalized[name] = text
+    return normalized
+
+def read_tags_mutagen(file_path: str) -> Optional[Dict[str, str]]:
+    """Read tags in-process with mutagen; None if mutagen cannot parse the file."""
+    try:
+        audio = mutagen.File(file_path)
+    except mutagen.MutagenError:
+        return None
+    if audio is None:
+        return None
+    return normalize_tags(audio.tags)
+
+# ffprobe codec_name for each mutagen file type whose stream header mutagen fully parses;
+# any other type (or an unrecognized MP4 codec) falls back to ffprobe
+MUTAGEN_CODECS = {
+    'FLAC': 'flac', 'OggFLAC': 'flac', 'MP3': 'mp3', 'EasyMP3': 'mp3', 'OggVorbis': 'vorbis',
+    'OggOpus': 'opus', 'OggSpeex': 'speex', 'WavPack': 'wavpack', 'MonkeysAudio': 'ape', 'TrueAudio': 'tta',
+}
+MP4_CODECS = {'mp4a': 'aac', 'alac': 'alac', 'ac-3': 'ac3', 'ec-3': 'eac3'}
+
+# Codecs with a fixed sample size (plus every pcm_*). Both backends report bit_depth 0 for any other
+# codec, as ffprobe does: mutagen would give AAC the 16 from its MP4 sample entry
+LOSSLESS_CODECS = ('flac', 'alac', 'wavpack', 'ape', 'tta', 'truehd')
+
+def stream_bit_depth(codec: str, bits) -> int:
+    """Get the bit depth both backends store: the sample size of a lossless or PCM codec, else 0."""
+    if codec in LOSSLESS_CODECS or codec.startswith('pcm_'):
+        return int(bits or 0)
+    return 0
+
+def _mutagen_codec(audio) -> Optional[str]:
+    """Get the ffprobe-style codec name of a file mutagen parsed, or None for an exotic codec."""
+    file_type = type(audio).__name__
+    info = audio.info
+    if file_type in MUTAGEN_CODECS:
+        return MUTAGEN_CODECS[file_type]
+    if file_type in ('WAVE', 'AIFF') and getattr(info, 'bits_per_sample', 0):
+        return f"pcm_s{info.bits_per_sample}{'le' if file_type == 'WAVE' else 'be'}"
+    if file_type in ('MP4', 'EasyMP4'):
+        return MP4_CODECS.get(getattr(info, 'codec', '').split('.')[0])
+    return None
+
+def read_audio_info_mutagen(file_path: str) -> Optional[tuple]:
+    """Read tags and stream details from the container headers in one in-process parse.
+    Returns (tags, stream_info) with stream_info holding codec, sample_rate, bit_depth, bit_rate,
+    channels and duration, or None when mutagen cannot parse the file or its codec is exotic.
+    """
+    try:
+        audio = mutagen.File(file_path)
+    except mutagen.MutagenError:
+        return None
+    if audio is None or audio.info is None:
+        return None
+    codec = _mutagen_codec(audio)
+    if codec is None:
+        return None
+    info = audio.info
+    length = float(getattr(info, 'length', 0) or 0)
+    stream_info = {
+        'codec': codec,
+        'sample_rate': int(getattr(info, 'sample_rate', 0) or 0),
+        'bit_depth': stream_bit_depth(codec, getattr(info, 'bits_per_sample', 0)),
+        # The whole file over its duration, like ffprobe's format bit_rate (mutagen leaves out the tags)
+        'bit_rate': (int(os.path.getsize(file_path) * 8 / length) if length
+                     else int(getattr(info, 'bitrate', 0) or 0)),
+        'channels': int(getattr(info, 'channels', 0) or 0),
+        'duration': length,
+    }
+    return normalize_tags(audio.tags), stream_info
+
+def read_tags_ffprobe(file_path: str, probe=probe_file) -> Dict[str, str]:
+    """Read tags from (cached) ffprobe data."""
+    return normalize_tags(probe(file_path).get("format", {}).get("tags", {}))
+
+def read_tags(file_path: str, backend: str = None) -> Dict[str, str]:
+    """Read a file's normalized tags with the given backend (default: get_tag_backend())."""
+    if (backend or get_tag_backend()) == 'mutagen':
+        tags = read_tags_mutagen(file_path)
+        if tags is not None:
+            return tags
+    return read_tags_ffprobe(file_path)
+
+def benchmark_tag_backends(directory: str, limit: int = 500) -> Dict[str, float]:
+    """Measure tag reading throughput in files/s for each backend on up to limit files of a library."""
+    files = []
+    for file_path in utils.iter_audio_files(directory):
+        files.append(file_path)
+        if len(files) >= limit:
+            break
+    results = {}
+    # The probe cache is bypassed so ffprobe is measured as a fresh subprocess per file
+    readers = (('mutagen', read_tags_mutagen), ('ffprobe', lambda path: read_tags_ffprobe(path, run_ffprobe)))
+    for backend, reader in readers:
+        if files:
+            try:
+                reader(files[0])  # Warm up imports and the page cache before timing
+            except Exception:
+                pass
+        start = time.perf_counter()
+        for file_path in files:
+            try:
+                reader(file_path)
+            except Exception:
+                pass
+        elapsed = time.perf_counter() - start
+        results[backend] = len(files) / elapsed if elapsed > 0 else 0.0
+    return results
+
+if __name__ == "__main__":
+    # Run with: python -m modules.tag_reader /path/to/music [max_files]
+    if len(sys.argv) < 2 or not os.path.isdir(sys.argv[1]):
+        print("Usage: python -m modules.tag_reader /path/to/music [max_files]")
+        sys.exit(1)
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    print(f"Tag backend: {get_tag_backend()} (set tags.backend in the config to override)")
+    for backend, speed in benchmark_tag_backends(sys.argv[1], limit).items():
+        print(f"  {backend:<8} {speed:8.1f} files/s")
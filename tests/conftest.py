@@ -0,0 +1,13 @@
+import sys
+from pathlib import Path
+import pytest
+
+# audio_tool.py, utils.py and modules/ are imported from the repository root, as the CLI does
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+@pytest.fixture(autouse=True)
+def work_dir(tmp_path, monkeypatch):
+    """Run every test from an empty directory, where load_config writes its config and cache folder."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,42 @@
+import pytest
+from mutagen.flac import FLAC, Picture
+from mutagen.id3 import ID3, APIC, TIT2, TPE1
+from modules.integrity_check.audio_hash import audio_hash
+from test_quick_verify import flac_stream
+from test_structure_check import mp3
+
+def _retag_flac(path: str):
+    audio = FLAC(path)
+    audio['title'] = "A much longer title than the file had, so the comment block grows"
+    audio['artist'] = "Someone"
+    picture = Picture()
+    picture.type, picture.mime, picture.data = 3, "image/jpeg", b'\xff\xd8' + b'\0' * 5000
+    audio.add_picture(picture)
+    audio.save()
+
+def _retag_mp3(path: str):
+    tags = ID3()
+    tags.add(TIT2(encoding=3, text="A new title"))
+    tags.add(TPE1(encoding=3, text="Someone"))
+    tags.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="", data=b'\xff\xd8' + b'\0' * 5000))
+    tags.save(path, v1=2)  # Rewrites the ID3v2 tag and the trailing ID3v1 tag
+
+@pytest.mark.parametrize("name, data, retag", [
+    ("a.flac", flac_stream(), _retag_flac),
+    ("a.mp3", mp3(), _retag_mp3),
+])
+def test_retagging_keeps_the_audio_hash(tmp_path, name, data, retag):
+    path = tmp_path / name
+    path.write_bytes(data)
+    before = audio_hash(str(path))
+    assert before is not None
+
+    retag(str(path))
+    assert path.read_bytes() != data
+    assert audio_hash(str(path)) == before
+
+    # One flipped bit in the middle of the audio changes it
+    retagged = bytearray(path.read_bytes())
+    retagged[len(retagged) // 2] ^= 0x01
+    path.write_bytes(bytes(retagged))
+    assert audio_hash(str(path)) != before
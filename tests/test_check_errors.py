@@ -0,0 +1,35 @@
+import argparse
+import importlib
+import pytest
+import utils
+from modules.integrity_check import pipeline
+
+# The package re-exports the process_file function under the module's name
+process_file = importlib.import_module("modules.integrity_check.process_file")
+
+def _raise_permission_error(file_path, *args, **kwargs):
+    raise PermissionError(13, "Permission denied", file_path)
+
+def test_process_file_converts_exceptions(monkeypatch):
+    """The sequential --verbose path reports an unreadable file instead of aborting the run."""
+    monkeypatch.setattr(process_file, "hash_step", _raise_permission_error)
+    action, status, message, file_path, info = process_file.process_file("locked.flac", "RUN_FFMPEG")
+    assert (action, status, file_path, info) == ('ERROR', None, "locked.flac", None)
+    assert message.startswith("PermissionError:")
+
+def test_pipeline_reports_the_same_error(monkeypatch, tmp_path):
+    """The pipeline turns the same failure into the same ERROR result as process_file."""
+    locked = tmp_path / "locked.flac"
+    locked.write_bytes(b"fLaC")
+    monkeypatch.setattr(pipeline, "hash_step", _raise_permission_error)
+    results = list(pipeline.run_pipeline([(str(locked), None)], {}, hash_workers=1, decode_workers=1))
+    monkeypatch.setattr(process_file, "hash_step", _raise_permission_error)
+    assert results == [process_file.process_file(str(locked), "RUN_FFMPEG")]
+
+@pytest.mark.parametrize("value", ["0", "-1", "two"])
+def test_positive_int_rejects_values_that_start_no_workers(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        utils.positive_int(value)
+
+def test_positive_int_accepts_counts():
+    assert utils.positive_int("3") == 3
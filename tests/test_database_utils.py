@@ -0,0 +1,50 @@
+import datetime
+import os
+import pytest
+from modules import database_utils
+
+@pytest.fixture
+def tracked_file(tmp_path):
+    """A file with a current file_tracking row, and the database holding it."""
+    db_path = tmp_path / "cache" / "tracking.db"
+    db_path.parent.mkdir()
+    file_path = tmp_path / "a.flac"
+    file_path.write_bytes(b"fLaC" + bytes(range(256)) * 64)
+    database_utils.init_db_with_wal(db_path, "")
+    with database_utils.transaction(db_path) as conn:
+        database_utils.update_file_tracking(conn, file_path)
+    yield db_path, file_path
+    database_utils.close_connections()
+
+def _signature(db_path, file_path) -> tuple:
+    with database_utils.transaction(db_path) as conn:
+        return conn.execute("SELECT file_size, mtime_ns, inode, last_processed FROM file_tracking WHERE file_path = ?",
+                            (str(file_path),)).fetchone()
+
+def test_touched_file_stores_its_new_signature(tracked_file, monkeypatch):
+    db_path, file_path = tracked_file
+    _, _, _, last_processed = _signature(db_path, file_path)
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+    assert not database_utils.needs_processing(db_path, file_path)
+    current = os.stat(file_path)
+    assert _signature(db_path, file_path) == (current.st_size, current.st_mtime_ns, current.st_ino, last_processed)
+
+    # The next run matches on the stat signature alone and reads nothing
+    monkeypatch.setattr(database_utils, "content_matches", pytest.fail)
+    assert not database_utils.needs_processing(db_path, file_path)
+
+def test_changed_content_is_processed(tracked_file):
+    db_path, file_path = tracked_file
+    stored = _signature(db_path, file_path)
+    file_path.write_bytes(b"fLaC" + bytes(range(255, -1, -1)) * 64)
+    assert database_utils.needs_processing(db_path, file_path)
+    assert _signature(db_path, file_path) == stored
+
+def test_stale_rows_are_processed(tracked_file):
+    db_path, file_path = tracked_file
+    two_days_ago = (datetime.datetime.now() - datetime.timedelta(days=2)).isoformat()
+    with database_utils.transaction(db_path) as conn:
+        conn.execute("UPDATE file_tracking SET last_processed = ?", (two_days_ago,))
+    assert database_utils.needs_processing(db_path, file_path)
@@ -0,0 +1,41 @@
+import sqlite3
+from modules.integrity_check import db_cleanup
+from modules.integrity_check.db_init import initialize_database
+
+def _rows(db_path) -> list:
+    conn = sqlite3.connect(db_path)
+    try:
+        return [path for (path,) in conn.execute("SELECT file_path FROM integrity_results ORDER BY file_path")]
+    finally:
+        conn.close()
+
+def test_cleanup_stays_under_the_scanned_root(tmp_path, monkeypatch):
+    db_path = tmp_path / "cache" / "audio_integrity.db"
+    initialize_database(db_path)
+    root = tmp_path / "music"
+    (root / ".hidden").mkdir(parents=True)
+    seen, hidden = root / "seen.flac", root / ".hidden" / "kept.flac"
+    seen.write_bytes(b"fLaC")
+    hidden.write_bytes(b"fLaC")
+    deleted = root / "deleted.flac"
+    sibling = tmp_path / "music2" / "elsewhere.flac"  # Sorts right after the root, but is outside it
+    outside = tmp_path / "other" / "gone.flac"
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO integrity_results (file_path, status) VALUES (?, 'PASSED')",
+                     [(str(path),) for path in (seen, hidden, deleted, sibling, outside)])
+    conn.commit()
+    conn.close()
+
+    checked = []
+    missing_path = db_cleanup._missing_path
+    monkeypatch.setattr(db_cleanup, "_missing_path", lambda path: checked.append(path) or missing_path(path))
+    db_cleanup.cleanup_database(db_path, str(root), [str(seen)])
+
+    # Only the unseen rows under the root were looked up; missing rows elsewhere belong to other checks
+    assert sorted(checked) == sorted([str(hidden), str(deleted)])
+    assert _rows(db_path) == sorted([str(seen), str(hidden), str(sibling), str(outside)])
+
+    checked.clear()
+    db_cleanup.cleanup_database(db_path)
+    assert _rows(db_path) == sorted([str(seen), str(hidden)])
+    assert len(checked) == 4
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+from modules.integrity_check.db_init import INTEGRITY_RESULTS_COLUMNS, initialize_database
+
+# passed_files/failed_files as the first releases of the check command created them
+BASELINE_SCHEMA = """
+CREATE TABLE passed_files (file_path TEXT PRIMARY KEY, file_hash TEXT, mtime REAL, status TEXT,
+                           last_checked TEXT, codec TEXT);
+CREATE TABLE failed_files (file_path TEXT PRIMARY KEY, file_hash TEXT, mtime REAL, status TEXT,
+                           last_checked TEXT, codec TEXT);
+"""
+
+def _baseline_database(db_path):
+    db_path.parent.mkdir(parents=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany("INSERT INTO passed_files VALUES (?, ?, ?, 'PASSED', ?, 'flac')", [
+        ("music/a.flac", "aaaa", 1.0, "2024-01-01 10:00:00"),
+        ("music/b.flac", "bbbb", 2.0, "2024-01-02 10:00:00"),
+        (os.path.abspath("music/e.flac"), "eeee", 5.0, "2024-02-01 10:00:00"),
+    ])
+    conn.executemany("INSERT INTO failed_files VALUES (?, ?, ?, 'FAILED', ?, 'mp3')", [
+        ("music/b.flac", "bbbc", 2.5, "2024-03-01 10:00:00"),  # Rechecked later and failed
+        ("music/c.mp3", "cccc", 3.0, "2024-01-03 10:00:00"),
+        ("music/e.flac", "eeed", 4.0, "2023-12-01 10:00:00"),  # Older relative duplicate of an absolute row
+    ])
+    conn.commit()
+    conn.close()
+
+def _contents(db_path) -> dict:
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            'objects': dict(conn.execute("SELECT name, type FROM sqlite_master "
+                                         "WHERE name IN ('integrity_results', 'passed_files', 'failed_files')")),
+            'rows': conn.execute("SELECT file_path, status, file_hash, hash_algorithm FROM integrity_results "
+                                 "ORDER BY file_path").fetchall(),
+            'columns': [row[1] for row in conn.execute("PRAGMA table_info(integrity_results)")],
+            'passed': [path for (path,) in conn.execute("SELECT file_path FROM passed_files ORDER BY file_path")],
+            'failed': [path for (path,) in conn.execute("SELECT file_path FROM failed_files ORDER BY file_path")],
+        }
+    finally:
+        conn.close()
+
+def test_baseline_database_migrates_once(tmp_path, capsys):
+    db_path = tmp_path / "cache" / "audio_integrity.db"
+    _baseline_database(db_path)
+    a, b, c, e = (os.path.abspath(f"music/{name}") for name in ("a.flac", "b.flac", "c.mp3", "e.flac"))
+
+    initialize_database(db_path)
+    output = capsys.readouterr().out
+    assert "Migrated passed_files/failed_files" in output and "Converted relative file paths" in output
+
+    migrated = _contents(db_path)
+    assert migrated['objects'] == {'integrity_results': 'table', 'passed_files': 'view', 'failed_files': 'view'}
+    assert migrated['columns'] == INTEGRITY_RESULTS_COLUMNS
+    assert migrated['rows'] == [
+        (a, 'PASSED', "aaaa", 'md5'),
+        (b, 'FAILED', "bbbc", 'md5'),
+        (c, 'FAILED', "cccc", 'md5'),
+        (e, 'PASSED', "eeee", 'md5'),
+    ]
+    assert migrated['passed'] == [a, e]
+    assert migrated['failed'] == [b, c]
+
+    # A second start finds nothing left to migrate or rewrite
+    initialize_database(db_path)
+    output = capsys.readouterr().out
+    assert "Migrated" not in output and "Converted" not in output
+    assert _contents(db_path) == migrated
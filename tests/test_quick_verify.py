@@ -0,0 +1,125 @@
+import random
+import struct
+import pytest
+from modules.integrity_check.quick_verify import (crc8, flac_frame_crc_ok, ogg_crc32, parse_flac_frame_header,
+                                                  quick_verify, verify_flac, verify_ogg)
+
+# Reference CRCs, bit by bit, straight from the polynomials in the FLAC and Ogg specifications
+def crc8_reference(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+def crc16_reference(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x8005) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+    return crc
+
+def crc32_ogg_reference(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc ^= byte << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7) & 0xFFFFFFFF if crc & 0x80000000 else (crc << 1) & 0xFFFFFFFF
+    return crc
+
+# First frame header of a fixed-blocksize 44.1 kHz, 16-bit stereo FLAC (4096-sample blocks), CRC-8 included
+REAL_FLAC_FRAME_HEADER = bytes.fromhex("FFF8C91800C2")
+
+def flac_frame(number: int, channels: list) -> bytes:
+    """A frame of verbatim 16-bit subframes: 4096 samples, 44.1 kHz, independent channels."""
+    header = bytes([0xFF, 0xF8, 0xC9, ((len(channels) - 1) << 4) | 0x08, number])
+    header += bytes([crc8_reference(header)])
+    body = b''.join(b'\x02' + struct.pack(f'>{len(samples)}h', *samples) for samples in channels)
+    frame = header + body
+    return frame + crc16_reference(frame).to_bytes(2, 'big')
+
+def flac_stream(frames: int = 3, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    streaminfo = struct.pack('>HH', 4096, 4096) + b'\0' * 6
+    streaminfo += ((44100 << 44) | (1 << 41) | (15 << 36) | (frames * 4096)).to_bytes(8, 'big') + b'\0' * 16
+    data = b'fLaC' + bytes([0x80]) + len(streaminfo).to_bytes(3, 'big') + streaminfo
+    for number in range(frames):
+        data += flac_frame(number, [[rng.randint(-32768, 32767) for _ in range(4096)] for _ in range(2)])
+    return data
+
+def ogg_page(sequence: int, flags: int, payload: bytes, granule: int = 0, serial: int = 7) -> bytes:
+    lacing = [255] * (len(payload) // 255) + [len(payload) % 255]
+    page = (b'OggS' + bytes([0, flags]) + struct.pack('<qIII', granule, serial, sequence, 0)
+            + bytes([len(lacing)]) + bytes(lacing) + payload)
+    return page[:22] + struct.pack('<I', crc32_ogg_reference(page)) + page[26:]
+
+def opus_stream(pages: int = 6) -> bytes:
+    rng = random.Random(1)
+    data = ogg_page(0, 0x02, b'OpusHead' + bytes([1, 2]) + b'\0' * 9)
+    data += ogg_page(1, 0, b'OpusTags' + b'\0' * 8)
+    for sequence in range(2, pages):
+        flags = 0x04 if sequence == pages - 1 else 0
+        data += ogg_page(sequence, flags, bytes(rng.getrandbits(8) for _ in range(700)), granule=sequence * 960)
+    return data
+
+def test_check_values():
+    """The published CRC check values over b'123456789'."""
+    assert crc8(b'123456789') == crc8_reference(b'123456789') == 0xF4
+    assert crc16_reference(b'123456789') == 0xFEE8
+    assert flac_frame_crc_ok(b'123456789' + (0xFEE8).to_bytes(2, 'big'))
+    assert ogg_crc32(b'123456789') == crc32_ogg_reference(b'123456789') == 0x89A1897F
+
+def test_real_flac_frame_header():
+    assert crc8(REAL_FLAC_FRAME_HEADER[:-1]) == REAL_FLAC_FRAME_HEADER[-1]
+    assert parse_flac_frame_header(REAL_FLAC_FRAME_HEADER + b'\0' * 10, 0) == 4096
+    corrupted = bytes([0xFF, 0xF8, 0xC9, 0x18, 0x01, 0xC2]) + b'\0' * 10
+    assert parse_flac_frame_header(corrupted, 0) is None
+
+def test_flac_frame_crc16_matches_reference():
+    frame = flac_frame(0, [[1000, -1000] * 2048, [7] * 4096])
+    assert frame[:6] == REAL_FLAC_FRAME_HEADER
+    assert flac_frame_crc_ok(frame)
+    for position in (6, len(frame) // 2, len(frame) - 1):
+        damaged = bytearray(frame)
+        damaged[position] ^= 0x10
+        assert not flac_frame_crc_ok(bytes(damaged))
+
+def test_verify_flac_stream():
+    data = flac_stream()
+    assert verify_flac(data) == (True, "3 FLAC frames pass CRC-8 and CRC-16")
+    damaged = bytearray(data)
+    damaged[len(data) // 2] ^= 0x01
+    assert not verify_flac(bytes(damaged))[0]
+
+def test_verify_flac_truncated():
+    data = flac_stream()
+    passed, reason = verify_flac(data[:-5000])
+    assert not passed and "truncated" in reason
+    # Whole frames missing: every remaining frame passes, but STREAMINFO's sample count does not
+    frame_length = (len(data) - 42) // 3
+    passed, reason = verify_flac(data[:42 + 2 * frame_length])
+    assert not passed and "STREAMINFO" in reason
+
+def test_verify_ogg_stream():
+    data = opus_stream()
+    assert verify_ogg(data) == (True, "6 Ogg pages pass CRC-32")
+    damaged = bytearray(data)
+    damaged[-100] ^= 0x01
+    assert verify_ogg(bytes(damaged)) == (False, "page 5 fails its CRC-32")
+
+def test_verify_ogg_truncated():
+    data = opus_stream()
+    assert verify_ogg(data[:-100]) == (False, "page 5 is truncated")
+    last_page = data.rfind(b'OggS')
+    assert verify_ogg(data[:last_page]) == (False, "a logical stream has no end-of-stream page (truncated)")
+
+@pytest.mark.parametrize("name, data", [("a.flac", flac_stream()), ("a.opus", opus_stream())])
+def test_quick_verify_files(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    result = quick_verify(str(path))
+    assert result['status'] == "PASSED" and result['codec'] == name.split('.')[1]
+    path.write_bytes(data[:-300])
+    assert quick_verify(str(path)) is None
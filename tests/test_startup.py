@@ -0,0 +1,39 @@
+import argparse
+import importlib
+import pytest
+import audio_tool
+from modules.startup_benchmark import LAZY_IMPORT_CHECKS, importtime_summary
+
+@pytest.mark.parametrize("argv", list(LAZY_IMPORT_CHECKS), ids=" ".join)
+def test_startup_skips_forbidden_imports(argv, tmp_path):
+    """`python -X importtime audio_tool.py ...` imports none of the modules the command does not need."""
+    imported = importtime_summary(list(argv), str(tmp_path))['modules']
+    assert imported, "no -X importtime output was parsed"
+    leaked = [name for name in LAZY_IMPORT_CHECKS[argv]
+              if any(module == name or module.startswith(name + ".") for module in imported)]
+    assert leaked == []
+    assert list(tmp_path.iterdir()) == []
+
+def _subcommand_help(parser: argparse.ArgumentParser) -> dict:
+    """Get {command: help} as listed by a parser's subcommand action."""
+    action = next(a for a in parser._actions if isinstance(a, argparse._SubParsersAction))
+    return {choice.dest: choice.help for choice in action._choices_actions}
+
+@pytest.mark.parametrize("command", list(audio_tool.COMMAND_MANIFEST))
+def test_manifest_matches_register_command(command):
+    """A manifest placeholder lists the command exactly as the module's register_command does."""
+    module_name, help_text = audio_tool.COMMAND_MANIFEST[command]
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        pytest.skip(f"{module_name} needs an optional dependency: {e}")
+
+    registered = argparse.ArgumentParser()
+    module.register_command(registered.add_subparsers(dest="command"))
+    assert _subcommand_help(registered) == {command: help_text}
+
+    full = audio_tool.build_parser([command])
+    placeholder = audio_tool.build_parser([])
+    assert _subcommand_help(full) == _subcommand_help(placeholder)
+    assert full.format_help() == placeholder.format_help()
+    assert callable(full.parse_args([command]).func)
@@ -0,0 +1,130 @@
+import importlib
+import struct
+import pytest
+from modules.integrity_check.structure_check import (ERROR_DECODE, ERROR_STRUCTURE, ERROR_TRUNCATED,
+                                                     check_structure)
+
+# The package re-exports the process_file function under the module's name
+process_file = importlib.import_module("modules.integrity_check.process_file")
+
+def atom(kind: bytes, body: bytes) -> bytes:
+    return struct.pack('>I', 8 + len(body)) + kind + body
+
+FTYP = atom(b'ftyp', b'M4A \0\0\0\0M4A mp42')
+
+def mp4(chunk_count: int = 2, payload: bytes = b'\x11' * 4000, table: bytes = b'stco') -> bytes:
+    """ftyp, moov/trak/mdia/minf/stbl/stco (or co64) whose chunk offsets point into mdat, then mdat."""
+    entry = 'I' if table == b'stco' else 'Q'
+
+    def moov(offsets):
+        stco = atom(table, b'\0\0\0\0' + struct.pack(f'>I{len(offsets)}{entry}', len(offsets), *offsets))
+        return atom(b'moov', atom(b'trak', atom(b'mdia', atom(b'minf', atom(b'stbl', stco)))))
+
+    mdat_start = len(FTYP) + len(moov([0] * chunk_count)) + 8
+    offsets = [mdat_start + i * len(payload) // chunk_count for i in range(chunk_count)]
+    return FTYP + moov(offsets) + atom(b'mdat', payload)
+
+def wav(frames: int = 4410) -> bytes:
+    fmt = b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 2, 44100, 44100 * 4, 4, 16)
+    data = b'data' + struct.pack('<I', frames * 4) + b'\x01\x02' * frames * 2
+    return b'RIFF' + struct.pack('<I', 4 + len(fmt) + len(data)) + b'WAVE' + fmt + data
+
+MP3_FRAME_LENGTH = 144 * 128000 // 44100  # MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, no padding
+
+def mp3_frame(padding: int = 0, body: bytes = b'') -> bytes:
+    header = bytes([0xFF, 0xFB, 0x90 | (padding << 1), 0x64])
+    return (header + body).ljust(MP3_FRAME_LENGTH + padding, b'\x55')
+
+def mp3(frames: int = 50, xing: bool = True) -> bytes:
+    """ID3v2 tag, an optional Xing header frame with the stream length, the frames and an ID3v1 tag."""
+    audio = b''.join(mp3_frame(i % 2) for i in range(frames))
+    if xing:
+        # MPEG-1 stereo: the Xing tag follows 32 bytes of side information
+        audio = mp3_frame(0, b'\0' * 32 + b'Xing' + struct.pack('>III', 3, frames + 1,
+                                                                 len(audio) + MP3_FRAME_LENGTH)) + audio
+    return b'ID3\x03\0\0\0\0\0\x10' + b'\0' * 16 + audio + b'TAG' + b'\0' * 125
+
+def structure_error(tmp_path, name: str, data: bytes):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return check_structure(str(path))
+
+@pytest.mark.parametrize("name, data", [
+    ("whole.m4a", mp4()),
+    ("co64.m4a", mp4(table=b'co64')),
+    ("whole.wav", wav()),
+    ("xing.mp3", mp3()),
+    ("plain.mp3", mp3(xing=False)),
+])
+def test_whole_files_pass(tmp_path, name, data):
+    assert structure_error(tmp_path, name, data) is None
+
+def _overrun_mp4() -> bytes:
+    """An stco atom whose size runs past the end of its stbl parent."""
+    data = bytearray(mp4())
+    stco = data.find(b'stco') - 4
+    data[stco:stco + 4] = struct.pack('>I', struct.unpack('>I', data[stco:stco + 4])[0] + 8)
+    return bytes(data)
+
+def _overrun_wav() -> bytes:
+    """A data chunk larger than the RIFF chunk around it, with trailing bytes so it fits the file."""
+    data = bytearray(wav())
+    data_chunk = data.find(b'data')
+    size = struct.unpack('<I', data[data_chunk + 4:data_chunk + 8])[0]
+    data[data_chunk + 4:data_chunk + 8] = struct.pack('<I', size + 100)
+    return bytes(data) + b'\0' * 200
+
+def _overrun_mp3() -> bytes:
+    """An ID3v2 tag whose declared size runs past the end of the file."""
+    data = bytearray(mp3())
+    data[6:10] = bytes([0x7F, 0x7F, 0x7F, 0x7F])
+    return bytes(data)
+
+@pytest.mark.parametrize("name, data, error_class, message", [
+    # Truncated: the file ends before the structure it declares
+    ("cut.m4a", mp4()[:-1000], ERROR_TRUNCATED, "'mdat' atom needs"),
+    ("no_moov.m4a", FTYP + atom(b'mdat', b'\x11' * 100), ERROR_TRUNCATED, "no 'moov' atom"),
+    ("cut.wav", wav()[:5000], ERROR_TRUNCATED, "RIFF header declares"),
+    ("cut_xing.mp3", mp3()[:-300], ERROR_TRUNCATED, "Xing header expects"),
+    ("cut_tail.mp3", mp3(xing=False)[:-300], ERROR_TRUNCATED, "last MPEG frame is cut off"),
+    ("empty.wav", b'', ERROR_TRUNCATED, "file is empty"),
+    # Structure: a box, chunk or tag that overruns its parent
+    ("overrun.m4a", _overrun_mp4(), ERROR_STRUCTURE, "'stco' atom overruns its parent"),
+    ("overrun.wav", _overrun_wav(), ERROR_STRUCTURE, "'data' chunk overruns the RIFF chunk"),
+    ("overrun.mp3", _overrun_mp3(), ERROR_STRUCTURE, "no MPEG audio frame near the start"),
+])
+def test_damaged_files_fail(tmp_path, name, data, error_class, message):
+    error = structure_error(tmp_path, name, data)
+    assert error is not None and error.error_class == error_class
+    assert message in str(error)
+
+@pytest.mark.parametrize("table, entry", [(b'stco', '>I'), (b'co64', '>Q')])
+def test_chunk_offset_past_the_end(tmp_path, table, entry):
+    data = bytearray(mp4(table=table))
+    last_offset = data.find(b'mdat') - 4 - struct.calcsize(entry)
+    data[last_offset:last_offset + struct.calcsize(entry)] = struct.pack(entry, len(data) + 10)
+    error = structure_error(tmp_path, "offset.m4a", bytes(data))
+    assert error.error_class == ERROR_TRUNCATED and "past the end of the file" in str(error)
+
+def test_formats_without_a_check_pass(tmp_path):
+    assert structure_error(tmp_path, "a.flac", b'not checked here') is None
+
+def _decode(tmp_path, monkeypatch, name: str, data: bytes, ffmpeg_status: str) -> tuple:
+    monkeypatch.setattr(process_file, "verify_file", lambda path: {
+        'status': ffmpeg_status, 'message': "" if ffmpeg_status == "PASSED" else "Invalid data found",
+        'codec': 'aac', 'codec_type': 'lossy'})
+    path = tmp_path / name
+    path.write_bytes(data)
+    return process_file.decode_step(str(path), {}, {})
+
+@pytest.mark.parametrize("name, data, ffmpeg_status, status, error_class", [
+    ("whole.m4a", mp4(), "PASSED", "PASSED", None),
+    ("cut.m4a", mp4()[:-1000], "PASSED", "FAILED", ERROR_TRUNCATED),
+    ("overrun.wav", _overrun_wav(), "PASSED", "FAILED", ERROR_STRUCTURE),
+    ("whole.mp3", mp3(), "FAILED", "FAILED", ERROR_DECODE),
+])
+def test_error_class_of_results(tmp_path, monkeypatch, name, data, ffmpeg_status, status, error_class):
+    """Structure failures are classified without FFmpeg; FFmpeg failures are 'decode'."""
+    action, result_status, message, _, info = _decode(tmp_path, monkeypatch, name, data, ffmpeg_status)
+    assert (action, result_status, info['error_class']) == ('RUN_FFMPEG', status, error_class)
+    assert message.startswith("Structure check:") == (error_class in (ERROR_TRUNCATED, ERROR_STRUCTURE))
@@ -0,0 +1,40 @@
+import os
+import pytest
+from modules.audio_analysis.audio_analysis import stream_info_from_probe
+from modules.tag_reader import read_audio_info_mutagen, stream_bit_depth
+from test_quick_verify import flac_stream
+from test_structure_check import mp3
+
+def _ffprobe_json(stream: dict, file_size: int, duration: float) -> dict:
+    """ffprobe -show_streams -show_format output for a single audio stream, strings and all."""
+    stream = dict(stream, index=0, codec_type="audio", duration=f"{duration:.6f}")
+    return {"streams": [stream],
+            "format": {"nb_streams": 1, "duration": f"{duration:.6f}", "size": str(file_size),
+                       "bit_rate": str(int(file_size * 8 / duration))}}
+
+@pytest.mark.parametrize("name, data, stream, duration", [
+    # 3 frames of 4096 samples; ffprobe gives FLAC a bits_per_raw_sample and no bits_per_sample
+    ("a.flac", flac_stream(), {"codec_name": "flac", "sample_rate": "44100", "channels": 2,
+                               "bits_per_sample": 0, "bits_per_raw_sample": "16"}, 3 * 4096 / 44100),
+    # 51 frames of 1152 samples, as the Xing header counts them; lossy, so no bit depth at all
+    ("a.mp3", mp3(), {"codec_name": "mp3", "sample_rate": "44100", "channels": 2,
+                      "bits_per_sample": 0}, 51 * 1152 / 44100),
+])
+def test_backends_agree(tmp_path, name, data, stream, duration):
+    """audio_analysis stores the same row whichever backend read the file."""
+    path = tmp_path / name
+    path.write_bytes(data)
+    _, from_mutagen = read_audio_info_mutagen(str(path))
+    from_ffprobe = stream_info_from_probe(_ffprobe_json(stream, os.path.getsize(path), duration))
+    assert from_mutagen.pop('duration') == pytest.approx(duration)
+    assert from_mutagen == from_ffprobe
+
+@pytest.mark.parametrize("codec, bits, bit_depth", [
+    ("flac", "24", 24),
+    ("pcm_s16le", 16, 16),
+    ("alac", 0, 0),
+    ("aac", 16, 0),  # mutagen reads 16 from the MP4 sample entry; ffprobe reports none
+    ("opus", None, 0),
+])
+def test_stream_bit_depth(codec, bits, bit_depth):
+    assert stream_bit_depth(codec, bits) == bit_depth
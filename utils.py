@@ -1,11 +1,14 @@
 import os
 import shutil
+import fnmatch
 import yaml
 from pathlib import Path
+from typing import Iterable, Iterator
 import argparse
 
 # Supported audio file extensions
 AUDIO_EXTENSIONS = ['.flac', '.wav', '.m4a', '.mp3', '.ogg', '.opus', '.ape', '.wv', '.wma']
+AUDIO_EXTENSION_SET = frozenset(AUDIO_EXTENSIONS)
 
 # Configuration file path
 CONFIG_FILE = Path("audio-script-config.yaml")
@@ -16,7 +19,9 @@ def load_config():
         "cache_folder": "cache log",
         "database": {
             "path": "cache log",
-            "auto_create": True
+            "auto_create": True,
+            "mmap_size": 268435456,  # bytes of each database SQLite may memory-map
+            "cache_size": -65536  # page cache per connection; negative values are KiB
         },
         "export": {
             "folder": "exports",
@@ -26,6 +31,19 @@ def load_config():
         "analysis": {
             "workers": 4,
             "verbose": False
+        },
+        "change_detection": {
+            "level": "partial"  # stat, partial or full
+        },
+        "scan": {
+            "skip_hidden": True,
+            "prune": []  # fnmatch patterns of directory names to skip
+        },
+        "tags": {
+            "backend": "mutagen"  # mutagen (falls back to ffprobe for files it cannot parse) or ffprobe
+        },
+        "hashing": {
+            "algorithm": None  # None picks the fastest installed: xxh3_128, blake3 or blake2b
         }
     }
 
@@ -52,14 +70,57 @@ def load_config():
     
     return config
 
+def is_audio_file(path: str) -> bool:
+    """Check whether a path has a supported audio extension."""
+    return os.path.splitext(path)[1].lower() in AUDIO_EXTENSION_SET
+
+def is_skipped_directory(name: str, skip_hidden: bool = True, prune: Iterable[str] = ()) -> bool:
+    """Check whether a directory walk should not descend into a directory with this name."""
+    if skip_hidden and name.startswith('.'):
+        return True
+    return any(fnmatch.fnmatch(name, pattern) for pattern in prune)
+
+def iter_audio_entries(directory: str, skip_hidden: bool = True, prune: Iterable[str] = ()) -> Iterator[os.DirEntry]:
+    """Walk a directory tree once with os.scandir, yielding audio file entries as they are found.
+    Entries cache their stat result, so callers can call entry.stat() without another syscall.
+    Hidden directories are skipped unless skip_hidden is False; directories whose name matches
+    any fnmatch pattern in prune are not descended into. Directory symlinks are not followed.
+    """
+    prune = tuple(prune)
+    stack = [directory]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                subdirectories = []
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not is_skipped_directory(entry.name, skip_hidden, prune):
+                                subdirectories.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSION_SET and entry.is_file():
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue  # Unreadable or vanished directory
+        stack.extend(reversed(subdirectories))
+
+def iter_audio_files(directory: str, skip_hidden: bool = True, prune: Iterable[str] = ()) -> Iterator[str]:
+    """Yield audio file paths under a directory as the walk finds them."""
+    for entry in iter_audio_entries(directory, skip_hidden, prune):
+        yield entry.path
+
 def get_audio_files(directory: str) -> list:
     """Recursively find audio files in a directory."""
-    audio_files = []
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if os.path.splitext(file)[1].lower() in AUDIO_EXTENSIONS:
-                audio_files.append(os.path.join(root, file))
-    return audio_files
+    return list(iter_audio_files(directory))
+
+def get_scan_options(config: dict) -> dict:
+    """Get the directory walk options (skip_hidden, prune) from the config."""
+    scan = config.get("scan", {})
+    return {
+        "skip_hidden": scan.get("skip_hidden", True),
+        "prune": scan.get("prune", [])
+    }
 
 def is_ffmpeg_installed() -> bool:
     """Check if FFmpeg is installed and available in PATH."""
@@ -80,3 +141,13 @@ def path_type(path: str) -> str:
     if os.path.exists(path):
         return path
     raise argparse.ArgumentTypeError(f"'{path}' does not exist")
+
+def positive_int(value: str) -> int:
+    """Custom argparse type for counts that must be at least 1, such as worker counts."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a whole number")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"'{value}' must be at least 1")
+    return number